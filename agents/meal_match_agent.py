@@ -1,77 +1,216 @@
 import warnings
 warnings.filterwarnings("ignore")
 
-from langchain_community.chat_models import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
-from tools.google_places_tool import GooglePlacesTool
+from tools.menu_fetcher import MenuFetcher
+from tools.menu_snippets import MenuSnippetExtractor, mentions
+from tools.candidate_ranking import CandidateScorer, top_k
+from tools.http_transport import with_current_context
 from managers.prompt_manager import PromptManager
-from managers.config_manager import get_config
+from managers.config_manager import get_setting
+from managers.resource_manager import get_places_tool, get_chat_model, get_vector_index
+from managers.tracing import count
+from agents.response_parser import parse_json_response
 
-import requests
-from bs4 import BeautifulSoup
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+NO_MENU_MATCH = "No clear matches found."
 
 class MealMatchAgent:
-    def __init__(self, api_key=None):
-        if api_key is None:
-            api_key = get_config("GOOGLE_MAPS_API_KEY")
-        self.places_tool = GooglePlacesTool(api_key)
-        self.llm = ChatOpenAI(temperature=0.2)
+    def __init__(self, api_key=None, places_tool=None, llm=None, vector_index=None):
+        self.places_tool = places_tool or get_places_tool(api_key)
+        self.llm = llm or get_chat_model("match", temperature=0.2)
         self.prompt_manager = PromptManager()
+        self.menu_fetcher = MenuFetcher()
+        self.snippet_extractor = MenuSnippetExtractor()
+        self.vector_index = vector_index or get_vector_index()
+        self.skip_llm_without_match = bool(get_setting("relevance.skip_llm_without_match", False))
+        self.min_similarity = float(get_setting(f"rag.min_similarity.{get_setting('rag.embedder', 'hashing')}", 0.0))
 
     def find_meals(self, user_input: str, location: str, radius: int = 1500) -> list:
-        raw_results = self.places_tool.search_places(user_input, location, radius=radius)
-        recommendations = []
-
-        for place in raw_results[:10]:
-            menu_text = self._try_fetch_menu_from_website(place)
-            summary = self._summarize_match(user_input, place, menu_text)
-            recommendations.append({
-                "name": place.get("name"),
-                "address": place.get("formatted_address"),
-                "lat": place.get("geometry", {}).get("location", {}).get("lat"),
-                "lng": place.get("geometry", {}).get("location", {}).get("lng"),
-                "place_id": place.get("place_id"),
-                "match_summary": summary,
-                "rating": place.get("rating"),
-                "user_ratings_total": place.get("user_ratings_total"),
-                "menu_excerpt": menu_text[:500] if menu_text else "Menu not found"
-            }) 
-
-        return recommendations
-
-    def _summarize_match(self, query: str, place: dict, menu: str = "") -> str:
+        raw_results = self.search_candidates(user_input, location, radius=radius)
+        return [self.match_place(user_input, place) for place in raw_results]
+
+    def search_candidates(self, user_input: str, location: str, radius: int = 1500) -> list:
+        """Scores up to location.max_results places as their pages arrive; only the best matching.top_k are enriched."""
+        radius = radius or int(get_setting("location.default_radius", 5000))
+        scorer = CandidateScorer(user_input, location, radius)
+        pages = self.places_tool.search_places_iter(user_input, location, radius=radius)
+        return top_k(pages, scorer, int(get_setting("matching.top_k", 10)))
+
+    def rank_candidates(self, user_input: str, places: list) -> list:
+        """Indices of places, most similar indexed menu/reviews first; places never indexed keep Google's order."""
+        scores = self._similarities(user_input, places)
+        return sorted(range(len(places)), key=lambda i: -scores.get(places[i].get("place_id"), 0.0))
+
+    def match_place(self, user_input: str, place: dict, language: str = None) -> dict:
+        menu_text = self._try_fetch_menu_from_website(place)
+        snippet = self._menu_snippet(user_input, menu_text)
+        if self._can_skip_llm(user_input, place, menu_text, snippet):
+            count("match_llm_skipped")
+            summary = NO_MENU_MATCH
+        else:
+            summary = self._summarize_match(user_input, place, snippet, language=language)
+        return self._build_recommendation(place, summary, menu_text, snippet)
+
+    def match_places(self, user_input: str, places: list, language: str = None, on_ready=None) -> list:
+        """Matches all candidates with a single LLM call; malformed verdicts fall back to per-place calls.
+
+        `on_ready(index, recommendation)` is called as soon as a place is settled without the LLM
+        (its scraped menu never mentions the dish), so callers need not wait for the batch call.
+        """
+        if not places:
+            return []
+        menus, snippets, summaries = [""] * len(places), [""] * len(places), [None] * len(places)
+        with ThreadPoolExecutor(max_workers=len(places)) as executor:
+            fetches = {executor.submit(with_current_context(self._try_fetch_menu_from_website), place): i
+                       for i, place in enumerate(places)}
+            for future in as_completed(fetches):
+                i = fetches[future]
+                menus[i] = future.result()
+                snippets[i] = self._menu_snippet(user_input, menus[i])
+                if self._can_skip_llm(user_input, places[i], menus[i], snippets[i]):
+                    summaries[i] = NO_MENU_MATCH
+                    if on_ready is not None:
+                        on_ready(i, self._build_recommendation(places[i], NO_MENU_MATCH, menus[i], snippets[i]))
+            similarities = self._similarities(user_input, places, kinds=("menu",))
+            # Most promising candidates first, so they get the model's attention at the top of the batch.
+            pending = sorted((i for i, summary in enumerate(summaries) if summary is None),
+                             key=lambda i: -similarities.get(places[i].get("place_id"), 0.0))
+            count("match_llm_skipped", len(places) - len(pending))
+            if pending:
+                batch = self._summarize_matches_batch(
+                    user_input, [places[i] for i in pending], [snippets[i] for i in pending], language=language
+                )
+                for i, summary in zip(pending, batch):
+                    summaries[i] = summary
+            missing = [i for i, summary in enumerate(summaries) if summary is None]
+            if missing:
+                print(f"⚠️ Batch match returned {len(missing)} malformed entries, retrying them one by one")
+                fallbacks = executor.map(with_current_context(
+                    lambda i: self._summarize_match(user_input, places[i], snippets[i], language=language)
+                ), missing)
+                for i, summary in zip(missing, fallbacks):
+                    summaries[i] = summary
+        return [self._build_recommendation(place, summary, menu, snippet)
+                for place, summary, menu, snippet in zip(places, summaries, menus, snippets)]
+
+    def _menu_snippet(self, query: str, menu_text: str) -> str:
+        if not menu_text:
+            return ""
+        snippet, _ = self.snippet_extractor.extract(query, menu_text)
+        return snippet
+
+    def _similarities(self, query: str, places: list, kinds: tuple = ("menu", "reviews")) -> dict:
+        try:
+            return self.vector_index.similarities(query, [place.get("place_id") for place in places], kinds)
+        except Exception as e:
+            print(f"⚠️ Vector index lookup failed: {e}")
+            return {}
+
+    def _can_skip_llm(self, query: str, place: dict, menu_text: str, snippet: str) -> bool:
+        # A scraped page that never mentions the dish and whose indexed chunks are all far from the
+        # query is a clear "no" without asking the LLM. Either signal alone is not: BM25 misses
+        # "similar" items the menu_match prompt accepts, and the vector score is only a hint. The
+        # name and types still count: a sushi bar whose homepage is all script says nothing about
+        # sushi, but matcher.yaml would say yes.
+        if not menu_text or snippet or not self.skip_llm_without_match:
+            return False
+        if mentions(query, " ".join([place.get("name", "")] + place.get("types", []))):
+            return False
+        similarity = self._similarities(query, [place], kinds=("menu",)).get(place.get("place_id"))
+        return similarity is not None and similarity < self.min_similarity
+
+    def _build_recommendation(self, place: dict, summary: str, menu_text: str, snippet: str = "") -> dict:
+        return {
+            "name": place.get("name"),
+            "address": place.get("formatted_address"),
+            "lat": place.get("geometry", {}).get("location", {}).get("lat"),
+            "lng": place.get("geometry", {}).get("location", {}).get("lng"),
+            "place_id": place.get("place_id"),
+            "match_summary": summary,
+            "rating": place.get("rating"),
+            "user_ratings_total": place.get("user_ratings_total"),
+            "menu_excerpt": (snippet or menu_text)[:500] if menu_text else "Menu not found"
+        }
+
+    def _summarize_match(self, query: str, place: dict, menu: str = "", language: str = None) -> str:
         name = place.get("name", "")
         types = ", ".join(place.get("types", []))
-        prompt_data = self.prompt_manager.load_prompt("matcher.yaml")
+        prompt = self.prompt_manager.get("matcher.yaml")
 
         messages = [
-            SystemMessage(content=prompt_data["system"]),
-            HumanMessage(content=prompt_data["template"].format(query=query, name=name, types=types))
+            SystemMessage(content=prompt.system_for(language)),
+            HumanMessage(content=prompt.format(query=query, name=name, types=types))
         ]
 
         if menu:
             try:
-                menu_prompt = self.prompt_manager.load_prompt("menu_match.yaml")
-                messages.append(HumanMessage(content=menu_prompt["template"].format(
-                    query=query, name=name, menu_items=menu[:1000]
-                )))
+                menu_prompt = self.prompt_manager.get("menu_match.yaml")
+                menu_content = menu_prompt.format(query=query, name=name, menu_items=menu)
+                instruction = menu_prompt.language_instruction(language)
+                if instruction:
+                    menu_content += "\n" + instruction
+                messages.append(HumanMessage(content=menu_content))
             except Exception as e:
                 print(f"⚠️ Error loading menu prompt: {e}")
 
         response = self.llm.invoke(messages)
         return response.content
 
-    def _try_fetch_menu_from_website(self, place: dict) -> str:
-        url = place.get("website") or place.get("url")
-        if not url:
-            return ""
+    def _summarize_matches_batch(self, query: str, places: list, menus: list, language: str = None) -> list:
+        excerpt_chars = int(get_setting("matching.batch_menu_chars", 600))
+        candidates = [{
+            "index": i,
+            "name": place.get("name", ""),
+            "types": place.get("types", []),
+            "menu": (menu or "")[:excerpt_chars],
+        } for i, (place, menu) in enumerate(zip(places, menus))]
+
+        prompt = self.prompt_manager.get("batch_match.yaml")
+        messages = [
+            SystemMessage(content=prompt.system_for(language)),
+            HumanMessage(content=prompt.format(
+                query=query, candidates=json.dumps(candidates, ensure_ascii=False)
+            ))
+        ]
+        summaries = [None] * len(places)
         try:
-            headers = {"User-Agent": "SmartMealFinder/1.0"}
-            res = requests.get(url, timeout=5, headers=headers)
-            soup = BeautifulSoup(res.text, "html.parser")
-            texts = soup.stripped_strings
-            full_text = " ".join(texts)
-            return full_text
+            response = self.llm.invoke(messages)
+            verdicts = parse_json_response(response.content)
         except Exception as e:
-            print(f"⚠️ Failed to fetch menu from {url}: {e}")
-            return ""
+            print(f"⚠️ Batch match failed: {e}")
+            return summaries
+        if not isinstance(verdicts, list):
+            return summaries
+
+        for verdict in verdicts:
+            if not isinstance(verdict, dict):
+                continue
+            index, summary = verdict.get("index"), verdict.get("summary")
+            if (isinstance(index, int) and 0 <= index < len(places) and summaries[index] is None
+                    and isinstance(verdict.get("match"), bool) and isinstance(summary, str) and summary.strip()):
+                summaries[index] = summary.strip()
+        return summaries
+
+    def _try_fetch_menu_from_website(self, place: dict) -> str:
+        # MenuFetcher answers from its page cache while fresh and revalidates with ETag/Last-Modified
+        # after that; the index only re-embeds when the text actually changed.
+        place_id = place.get("place_id")
+        url = place.get("website") or place.get("url")
+        menu_text = ""
+        if url:
+            try:
+                menu_text = self.menu_fetcher.fetch(url)
+            except Exception as e:
+                print(f"⚠️ Failed to fetch menu from {url}: {e}")
+        if not menu_text:
+            # The site is down or unreachable right now; the last indexed copy beats nothing.
+            return (self.vector_index.get_document(place_id, "menu") or "") if place_id else ""
+        if place_id:
+            try:
+                self.vector_index.add_document(place_id, "menu", menu_text)
+            except Exception as e:
+                print(f"⚠️ Failed to index menu of {place.get('name')}: {e}")
+        return menu_text
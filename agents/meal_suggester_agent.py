@@ -1,33 +1,36 @@
-import json
-from langchain_community.chat_models import ChatOpenAI
-from langchain.schema import HumanMessage
+from langchain.schema import SystemMessage, HumanMessage
+from managers.prompt_manager import PromptManager
+from managers.resource_manager import get_chat_model
+from agents.response_parser import parse_json_response
 
 class MealSuggesterAgent:
-    def __init__(self):
-        self.llm = ChatOpenAI(temperature=0.2)
+    def __init__(self, llm=None):
+        self.llm = llm or get_chat_model("suggest", temperature=0.2)
+        self.prompt_manager = PromptManager()
 
-    def get_general_suggestions(self):
-        prompt = (
-            f"Return a JSON list of 8 popular meals, each with an emoji and short label."
-            "Example format: [[\"🍔\", \"Burger\"], [\"🍕\", \"Pizza\"], [\"🍣\", \"Sushi\"]]"
-        )
-        response = self.llm.invoke([HumanMessage(content=prompt)])
+    def get_general_suggestions(self, language: str = None) -> list:
+        """Returns [[emoji, label], ...], or an empty list when the answer is not usable."""
+        items = self._ask("suggest_general.yaml", language)
+        return [
+            item for item in items
+            if isinstance(item, list) and len(item) == 2 and all(isinstance(part, str) and part for part in item)
+        ]
 
-        try:
-            return json.loads(response.content)
-        except json.JSONDecodeError:
-            print("⚠️ Could not parse LLM response:", response.content)
-            return []
+    def get_sub_suggestions(self, meal: str, language: str = None) -> list:
+        items = self._ask("suggest_variants.yaml", language, meal=meal.lower())
+        return [item for item in items if isinstance(item, str) and item]
 
-    def get_sub_suggestions(self, meal: str):
-        prompt = (
-            f"Return a JSON list of 4 specific types of {meal.lower()} someone might want to eat. "
-            f"Example for 'Burger': [\"Chicken Burger\", \"Cheeseburger\", \"Vegan Burger\"]"
-        )
-        response = self.llm.invoke([HumanMessage(content=prompt)])
+    def _ask(self, prompt_name: str, language: str = None, **values) -> list:
+        prompt = self.prompt_manager.get(prompt_name)
+        messages = [
+            SystemMessage(content=prompt.system_for(language)),
+            HumanMessage(content=prompt.format(**values))
+        ]
+        response = self.llm.invoke(messages)
 
         try:
-            return json.loads(response.content)
-        except json.JSONDecodeError:
-            print("⚠️ Could not parse sub-suggestions for", meal, ":", response.content)
+            items = parse_json_response(response.content)
+        except ValueError:
+            print(f"⚠️ Could not parse suggestions from {prompt_name}:", response.content)
             return []
+        return items if isinstance(items, list) else []
@@ -0,0 +1,9 @@
+import json
+
+def parse_json_response(text: str):
+    """Parses an LLM answer that should be JSON, tolerating a surrounding ``` code fence."""
+    text = (text or "").strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return json.loads(text.strip())
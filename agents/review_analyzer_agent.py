@@ -1,33 +1,63 @@
-from langchain.chat_models import ChatOpenAI
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from langchain.schema import SystemMessage, HumanMessage
-from tools.google_places_tool import GooglePlacesTool
 from managers.prompt_manager import PromptManager
-from managers.config_manager import get_config
+from managers.resource_manager import get_places_tool, get_chat_model, get_vector_index
+from managers.cache_manager import get_cache
+from managers.config_manager import get_setting
+from managers.tracing import count
+from tools.http_transport import with_current_context
+
+NO_REVIEWS_SUMMARY = "No reviews found."
+CHARS_PER_TOKEN = 4
+MAX_STORED_REVIEW_IDS = 200
+
+def review_id(review: dict) -> str:
+    author = hashlib.sha256(review.get("author_name", "").encode("utf-8")).hexdigest()[:12]
+    return f"{review.get('time', '')}:{author}"
+
+def review_fingerprint(reviews: list) -> str:
+    return hashlib.sha256("\n".join(sorted(review_id(r) for r in reviews)).encode("utf-8")).hexdigest()
+
+def chunk_reviews(texts: list, chunk_chars: int) -> list:
+    chunks, current, size = [], [], 0
+    for text in texts:
+        if current and size + len(text) > chunk_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += len(text)
+    if current:
+        chunks.append(current)
+    return chunks
 
 class ReviewAnalyzerAgent:
-    def __init__(self, api_key=None):
-        if api_key is None:
-            api_key = get_config("GOOGLE_MAPS_API_KEY")
-        self.places_tool = GooglePlacesTool(api_key)
-        self.llm = ChatOpenAI(temperature=0.3)
+    def __init__(self, api_key=None, places_tool=None, llm=None, vector_index=None):
+        self.places_tool = places_tool or get_places_tool(api_key)
+        self.llm = llm or get_chat_model("review", temperature=0.3)
+        self.vector_index = vector_index or get_vector_index()
         self.prompt_manager = PromptManager()
+        self.mode = get_setting("reviews.mode", "single")
+        self.max_reviews = int(get_setting("reviews.max_reviews", 5))
+        self.sorts = get_setting("reviews.sorts", ["most_relevant", "newest"])
+        self.budget_chars = int(get_setting("reviews.token_budget", 3000)) * CHARS_PER_TOKEN
+        self.chunk_chars = int(get_setting("reviews.chunk_tokens", 800)) * CHARS_PER_TOKEN
+        # Summary and review fingerprint per place and language, so unchanged reviews skip the LLM.
+        self.store = get_cache("review_summaries", max_entries=5000,
+                               default_ttl=float(get_setting("reviews.summary_ttl", 2592000)))
 
-    def analyze_reviews(self, place_id: str) -> dict:
+    def analyze_reviews(self, place_id: str, language: str = None) -> dict:
         details = self.places_tool.get_place_details(place_id)
-        reviews = details.get("reviews", [])
+        reviews = self._collect_reviews(place_id, details.get("reviews", []))
 
         if not reviews:
-            return {"summary": "No reviews found."}
-
-        review_texts = [review.get("text", "") for review in reviews[:5]]
-        combined_text = "\n".join(review_texts)
+            return {"summary": NO_REVIEWS_SUMMARY}
+        try:
+            # Lets later searches rank this place by what reviewers say about its food.
+            self.vector_index.add_document(place_id, "reviews", "\n".join(r["text"] for r in reviews))
+        except Exception as e:
+            print(f"⚠️ Failed to index reviews of {details.get('name')}: {e}")
 
-        prompt_data = self.prompt_manager.load_prompt("review.yaml")
-        messages = [
-            SystemMessage(content=prompt_data["system"]),
-            HumanMessage(content=prompt_data["template"].format(reviews=combined_text))
-        ]
-        response = self.llm.invoke(messages)
         price_level = details.get("price_level")
         price_description = {
             0: "Free",
@@ -37,7 +67,7 @@ class ReviewAnalyzerAgent:
             4: "$$$$ Very Expensive"
         }.get(price_level, "Unknown")
         return {
-            "summary": response.content,
+            "summary": self._summary_for(place_id, reviews, language),
             "rating": details.get("rating"),
             "user_ratings_total": details.get("user_ratings_total"),
             "address": details.get("formatted_address"),
@@ -45,3 +75,71 @@ class ReviewAnalyzerAgent:
             "price": price_description,
             "opening_hours": details.get("opening_hours")
         }
+
+    def _collect_reviews(self, place_id: str, reviews: list) -> list:
+        if self.mode != "map_reduce":
+            return [r for r in reviews[:self.max_reviews] if r.get("text")]
+
+        collected = {review_id(r): r for r in reviews}
+        for sort in self.sorts:
+            if sort == "most_relevant" and reviews:
+                continue  # the details call already returned this order
+            for review in self.places_tool.get_place_reviews(place_id, sort):
+                collected.setdefault(review_id(review), review)
+
+        kept, used = [], 0
+        for review in collected.values():
+            text = review.get("text", "")
+            if not text or (kept and used + len(text) > self.budget_chars):
+                continue
+            kept.append(review)
+            used += len(text)
+        return kept
+
+    def _summary_for(self, place_id: str, reviews: list, language: str = None) -> str:
+        key = f"{place_id}:{(language or 'English').lower()}"
+        fingerprint = review_fingerprint(reviews)
+        stored = self.store.get(key)
+        if stored is not None and stored["fingerprint"] == fingerprint:
+            count("review_summaries", outcome="reused")
+            return stored["summary"]
+
+        known = set(stored["review_ids"]) if stored is not None else set()
+        new_reviews = [r for r in reviews if review_id(r) not in known]
+        new_texts = [r["text"] for r in new_reviews]
+        if stored is not None and new_texts and sum(map(len, new_texts)) <= self.chunk_chars:
+            summary = self._ask("review_update.yaml", language,
+                                summary=stored["summary"], reviews="\n".join(new_texts))
+            count("review_summaries", outcome="updated")
+        elif stored is not None and not new_texts:
+            summary = stored["summary"]  # only older reviews dropped out of the set
+            count("review_summaries", outcome="reused")
+        else:
+            summary = self._summarize([r["text"] for r in reviews], language)
+            count("review_summaries", outcome="full")
+
+        review_ids = list(dict.fromkeys([review_id(r) for r in reviews] + list(known)))[:MAX_STORED_REVIEW_IDS]
+        self.store.set(key, {"fingerprint": fingerprint, "review_ids": review_ids, "summary": summary})
+        return summary
+
+    def _summarize(self, texts: list, language: str = None) -> str:
+        chunks = chunk_reviews(texts, self.chunk_chars)
+        if len(chunks) == 1:
+            return self._ask("review.yaml", language, reviews="\n".join(chunks[0]))
+
+        # Map: chunks are summarized in parallel, so a long review set costs two LLM round trips, not one per chunk.
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            partials = list(executor.map(
+                with_current_context(lambda chunk: self._ask("review.yaml", language, reviews="\n".join(chunk))),
+                chunks
+            ))
+        summaries = "\n\n".join(f"Batch {i + 1}:\n{partial}" for i, partial in enumerate(partials))
+        return self._ask("review_reduce.yaml", language, summaries=summaries)
+
+    def _ask(self, prompt_name: str, language: str = None, **values) -> str:
+        prompt = self.prompt_manager.get(prompt_name)
+        messages = [
+            SystemMessage(content=prompt.system_for(language)),
+            HumanMessage(content=prompt.format(**values))
+        ]
+        return self.llm.invoke(messages).content
@@ -1,22 +1,75 @@
-from langchain_community.chat_models import ChatOpenAI
+import json
+import hashlib
 from langchain.schema import SystemMessage, HumanMessage
-from managers.prompt_manager import PromptManager
+from managers.prompt_manager import PromptManager, is_english
+from managers.resource_manager import get_chat_model
+from managers.cache_manager import get_cache
+from managers.config_manager import get_setting
+from agents.response_parser import parse_json_response
 
 class TranslationAgent:
-    def __init__(self, target_language: str):
-        self.llm = ChatOpenAI(temperature=0)
+    def __init__(self, target_language: str = None, llm=None):
+        self.llm = llm or get_chat_model("translate", temperature=0)
         self.target_language = target_language
         self.prompt_manager = PromptManager()
+        self.cache = get_cache("translations", max_entries=5000,
+                               default_ttl=float(get_setting("cache.llm.ttl.translate", 604800)))
 
-    def translate(self, text: str) -> str:
-        if not text or self.target_language.lower() in ["english", "en"]:
+    def translate(self, text: str, language: str = None) -> str:
+        language = language or self.target_language
+        if not text or is_english(language):
             return text  # no need to translate
 
-        prompt = self.prompt_manager.load_prompt("translator.yaml")
+        prompt = self.prompt_manager.get("translator.yaml")
 
         messages = [
-            SystemMessage(content=prompt["system"]),
-            HumanMessage(content=prompt["template"].format(text=text, language=self.target_language))
+            SystemMessage(content=prompt.system),
+            HumanMessage(content=prompt.format(text=text, language=language))
         ]
         response = self.llm.invoke(messages)
         return response.content
+
+    def translate_batch(self, texts: list, language: str = None) -> list:
+        """Translates all strings with one LLM call. Repeated and previously seen strings are served from cache."""
+        language = language or self.target_language
+        if is_english(language):
+            return list(texts)
+
+        translated = {}
+        pending = []
+        for text in dict.fromkeys(t for t in texts if t):
+            cached = self.cache.get(self._cache_key(text, language))
+            if cached is not None:
+                translated[text] = cached
+            else:
+                pending.append(text)
+
+        if pending:
+            for text, result in zip(pending, self._translate_pending(pending, language)):
+                translated[text] = result
+                self.cache.set(self._cache_key(text, language), result)
+
+        return [translated.get(text, text) for text in texts]
+
+    def _translate_pending(self, texts: list, language: str) -> list:
+        if len(texts) == 1:
+            return [self.translate(texts[0], language)]
+
+        prompt = self.prompt_manager.get("translator_batch.yaml")
+        messages = [
+            SystemMessage(content=prompt.system),
+            HumanMessage(content=prompt.format(
+                texts=json.dumps(texts, ensure_ascii=False), language=language
+            ))
+        ]
+        try:
+            results = parse_json_response(self.llm.invoke(messages).content)
+            if isinstance(results, list) and len(results) == len(texts) and all(isinstance(r, str) for r in results):
+                return results
+            print("⚠️ Batch translation returned a malformed list, translating one by one")
+        except Exception as e:
+            print(f"⚠️ Batch translation failed: {e}")
+        return [self.translate(text, language) for text in texts]
+
+    def _cache_key(self, text: str, language: str) -> str:
+        return hashlib.sha256(f"{language.lower()}\n{text}".encode("utf-8")).hexdigest()
@@ -1,56 +1,70 @@
 import warnings
 warnings.filterwarnings("ignore")
-from workflow.meal_recommendation_workflow import MealRecommendationWorkflow
+import argparse
+from managers.resource_manager import get_workflow, get_geocoder
+from managers.tracing import span, start_trace
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workflow'))
 
 
-import requests
-import urllib.parse
-
 def geocode_location(location_name: str) -> str:
-    encoded_location = urllib.parse.quote(location_name)
-    url = f"https://nominatim.openstreetmap.org/search?q={encoded_location}&format=json&limit=1"
-    response = requests.get(url, headers={"User-Agent": "SmartMealFinder/1.0"})
-
-    if response.status_code == 200:
-        data = response.json()
-        if data:
-            lat = data[0]['lat']
-            lon = data[0]['lon']
-            return f"{lat},{lon}"
-    print("❌ Could not geocode the location name. Please try a different one.")
-    return ""
+    with span("geocode"):
+        location = get_geocoder().geocode(location_name)
+    if not location:
+        print("❌ Could not geocode the location name. Please try a different one.")
+    return location
+
+def print_recommendation(r: dict):
+    print(f"\n--- {r['name']} ---")
+    print(f"📍 Address: {r['address']}")
+    print(f"⭐  Rating: {r['rating']} ({r['user_ratings_total']} reviews)")
+    print(f"🔍 Match Summary: {r['match_summary']}")
+    print(f"📝 Review Summary: {r['summary']}")
+
+    if r.get("menu_excerpt") and r["menu_excerpt"] != "Menu not found":
+        print("📋 Menu Sample:\n")
+        print(r["menu_excerpt"][:500])
 
 def main():
+    parser = argparse.ArgumentParser(description="Smart Meal Finder in the terminal")
+    parser.add_argument("--profile", action="store_true",
+                        help="print per-stage timings, upstream calls, LLM tokens and cache hit rates")
+    args = parser.parse_args()
+
     print("\n🍔 Restaurant Recommender!\n")
     meal = input("What do you feel like eating? (e.g., chicken burger): ")
     location_name = input("Enter your city or neighborhood (e.g., Warsaw, Poland): ")
 
+    trace = start_trace("search", meal=meal, location=location_name) if args.profile else None
+    search(meal, location_name)
+    if trace is not None:
+        trace.finish()
+        print("\n" + trace.format_summary())
+
+def search(meal: str, location_name: str):
     location = geocode_location(location_name)
     if not location:
         return
 
-    workflow = MealRecommendationWorkflow()
-    results = workflow.run(meal, location)
+    workflow = get_workflow()
+    found = 0
+    for event in workflow.run_iter(meal, location):
+        if event["event"] == "places_found":
+            if not event["count"]:
+                break
+            print(f"🔎 Found {event['count']} places, checking menus and reviews...")
+        elif event["event"] == "match_done":
+            print(f"   ✔ Menu checked: {event['name']}")
+        elif event["event"] == "result":
+            if not found:
+                print("\n✅ Top Recommendations:")
+            found += 1
+            print_recommendation(event["recommendation"])
 
-    if not results:
+    if not found:
         print("\n❌ No recommendations found. Try a different meal or location.")
-        return
-
-    print("\n✅ Top Recommendations:")
-    for r in results:
-        print(f"\n--- {r['name']} ---")
-        print(f"📍 Address: {r['address']}")
-        print(f"⭐  Rating: {r['rating']} ({r['user_ratings_total']} reviews)")
-        print(f"🔍 Match Summary: {r['match_summary']}")
-        print(f"📝 Review Summary: {r['summary']}")
-
-        if r.get("menu_excerpt") and r["menu_excerpt"] != "Menu not found":
-            print("📋 Menu Sample:\n")
-            print(r["menu_excerpt"][:500])
 
 if __name__ == "__main__":
     main()
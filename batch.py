@@ -0,0 +1,154 @@
+import warnings
+warnings.filterwarnings("ignore")
+import os
+import csv
+import json
+import time
+import uuid
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from managers.config_manager import get_setting
+from managers.concurrency_manager import set_flow
+from managers.resource_manager import get_workflow, get_geocoder
+from tools.geo_utils import parse_location
+
+def _parse_line(line: str):
+    try:
+        row = json.loads(line)
+    except json.JSONDecodeError as e:
+        return ValueError(f"invalid JSON: {e}")
+    return row if isinstance(row, dict) else ValueError("a query line must be a JSON object")
+
+def read_queries(path: str):
+    """Yields (query_id, query) from a JSONL or CSV file; rows without an id are numbered by position.
+
+    A malformed JSONL line yields its number and a ValueError instead of a query, so it is
+    recorded as failed and the rest of the file still runs.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (_parse_line(line) for line in f if line.strip())
+        for number, row in enumerate(rows, start=1):
+            if isinstance(row, Exception):
+                print(f"⚠️ Query {number} is malformed: {row}")
+                yield str(number), row
+            else:
+                yield str(row.get("id") or number), row
+
+def drop_torn_line(output_path: str, block_size: int = 65536):
+    """Cuts a half-written last record left by a crash, so appended records start on a fresh line.
+
+    Scans backwards from the end, so only the torn tail is read however large the file is.
+    """
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if not end:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)  # not a single complete record
+
+def completed_ids(output_path: str, retry_failed: bool = False) -> set:
+    """Ids already written to the output file; this is the checkpoint a restarted run resumes from."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok" or not retry_failed:
+                done.add(record["id"])
+    return done
+
+def run_query(query_id: str, query, deadline: float = None) -> dict:
+    if isinstance(query, Exception):  # a line read_queries could not parse
+        return {"id": query_id, "status": "error", "error": str(query), "elapsed": 0.0}
+    set_flow(uuid.uuid4().hex)  # each query gets its own share of the upstream quotas
+    started = time.monotonic()
+    meal, location = str(query.get("meal") or "").strip(), str(query.get("location") or "").strip()
+    record = {"id": query_id, "meal": meal, "location": location,
+              "language": query.get("language") or "English", "radius": query.get("radius") or None}
+    try:
+        if not meal or not location:
+            raise ValueError("meal and location are required")
+        coordinates = location if parse_location(location) else get_geocoder().geocode(location)
+        if not coordinates:
+            raise ValueError("location not found")
+        radius = int(float(record["radius"])) if record["radius"] else None
+        results = get_workflow().run(meal, coordinates, radius=radius, deadline=deadline,
+                                     language=record["language"])
+        record.update(status="ok", coordinates=coordinates, results=results)
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    record["elapsed"] = round(time.monotonic() - started, 3)
+    return record
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL/CSV file of (meal, location, language, radius) queries.")
+    parser.add_argument("input", help="queries as .jsonl or .csv")
+    parser.add_argument("-o", "--output", help="results JSONL (default: <input>.results.jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=int(get_setting("batch.workers", 8)))
+    parser.add_argument("--deadline", type=float, default=None, help="seconds per query (default: http.search_deadline)")
+    parser.add_argument("--retry-failed", action="store_true", help="run queries that ended with an error again (the new record is appended)")
+    parser.add_argument("--fresh", action="store_true", help="ignore existing output instead of resuming")
+    args = parser.parse_args()
+
+    output_path = args.output or f"{os.path.splitext(args.input)[0]}.results.jsonl"
+    if args.fresh and os.path.exists(output_path):
+        os.remove(output_path)
+    drop_torn_line(output_path)
+    done = completed_ids(output_path, args.retry_failed)
+    if done:
+        print(f"↩️ Resuming: {len(done)} queries already in {output_path}")
+
+    get_workflow()  # build the shared clients once, before the workers start
+    # Only a few queries wait ahead of the workers, so memory stays flat on very large inputs.
+    max_pending = args.workers * 2
+    written, failed, started = 0, 0, time.monotonic()
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=args.workers) as executor:
+        pending = set()
+
+        def drain(block_until: int):
+            nonlocal written, failed
+            while len(pending) > block_until:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    pending.discard(future)
+                    record = future.result()
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    written += 1
+                    failed += record["status"] != "ok"
+                    if written % 10 == 0:
+                        rate = written / (time.monotonic() - started)
+                        print(f"✔ {written} done ({failed} failed), {rate:.2f} queries/s")
+
+        for query_id, query in read_queries(args.input):
+            if query_id in done:
+                continue
+            done.add(query_id)  # duplicate ids in the input run once
+            pending.add(executor.submit(run_query, query_id, query, args.deadline))
+            drain(max_pending - 1)
+        drain(0)
+
+    print(f"\n✅ {written} queries written to {output_path} ({failed} failed) in {time.monotonic() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Offline end-to-end benchmark of MealRecommendationWorkflow against local fake upstreams.
+
+Starts benchmarks/fake_servers.py in a child process, points the Places, Nominatim, OpenAI and scraper clients at it,
+runs a scenario from e2e_scenarios.yaml with N concurrent searches on cold caches and reports
+end-to-end p50/p95/p99, throughput, per-stage timings, upstream calls and the traced counters
+(LLM tokens, scraped bytes, cache hits) per search. Results are compared
+with e2e_baseline.json.
+
+    python benchmarks/e2e.py                      # default scenario, compare with the baseline
+    python benchmarks/e2e.py --scenario smoke
+    python benchmarks/e2e.py --update             # store this run as the new baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+SCENARIOS_PATH = os.path.join(BENCH_DIR, "e2e_scenarios.yaml")
+BASELINE_PATH = os.path.join(BENCH_DIR, "e2e_baseline.json")
+
+from fake_servers import UpstreamProcess  # noqa: E402
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low, high = int(position), min(int(position) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def summarize(values: list) -> dict:
+    return {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95), "p99": percentile(values, 0.99)}
+
+def apply_settings(overrides: dict):
+    """Overrides dotted config keys in the loaded settings; must run before the app modules are imported."""
+    from managers.config_manager import load_settings
+    settings = load_settings()
+    for path, value in (overrides or {}).items():
+        node = settings
+        *parents, leaf = path.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+
+def run_search(workflow, meal: str, location: str, language: str) -> dict:
+    started = time.monotonic()
+    timing = {"reviews_ready": [], "match_ready": []}
+    places_found = None
+    results = errors = 0
+    counters = {}
+    for event in workflow.run_iter(meal, location, language=language):
+        now = time.monotonic() - started
+        kind = event["event"]
+        if kind == "places_found":
+            places_found = now
+            timing["search"] = now
+        elif kind == "reviews_done":
+            timing["reviews_ready"].append(now - (places_found or 0))
+        elif kind == "match_done":
+            timing["match_ready"].append(now - (places_found or 0))
+        elif kind == "result":
+            results += 1
+            timing.setdefault("first_result", now)
+        elif kind in ("error", "deadline"):
+            errors += 1
+        elif kind == "trace":
+            counters = event["trace"]["counters"]
+    timing["total"] = time.monotonic() - started
+    return {"timing": timing, "results": results, "errors": errors, "counters": counters}
+
+def run_scenario(name: str, scenario: dict) -> dict:
+    # Separate process: the fakes' own CPU work must not show up in the app's latency.
+    upstreams = UpstreamProcess(scenario.get("services", {}), seed=int(scenario.get("seed", 0)))
+    upstreams.start()
+    os.environ.update(upstreams.env())
+    os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="mealfinder-bench-")  # cold caches for every run
+    apply_settings(scenario.get("settings"))
+
+    from managers.resource_manager import get_workflow, get_geocoder
+    workflow = get_workflow()
+    geocoder = get_geocoder()
+
+    meals = scenario.get("meals", ["burger", "pizza", "sushi", "ramen", "pierogi"])
+    cities = scenario.get("locations", ["Warsaw", "Krakow", "Gdansk", "Wroclaw"])
+    distinct = int(scenario.get("distinct_queries", 10))
+    queries = [(meals[i % len(meals)], f"{cities[i % len(cities)]} {i // len(cities)}") for i in range(distinct)]
+    searches = int(scenario.get("searches", 20))
+    language = scenario.get("language", "English")
+
+    def one(i: int) -> dict:
+        meal, place = queries[i % len(queries)]
+        started = time.monotonic()
+        location = geocoder.geocode(place)
+        outcome = run_search(workflow, meal, location, language)
+        outcome["latency"] = time.monotonic() - started
+        outcome["timing"]["geocode"] = outcome["latency"] - outcome["timing"]["total"]
+        return outcome
+
+    print(f"▶ {name}: {searches} searches, {scenario.get('concurrency', 4)} concurrent, {distinct} distinct queries")
+    wall_started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=int(scenario.get("concurrency", 4))) as executor:
+        outcomes = list(executor.map(one, range(searches)))
+    wall = time.monotonic() - wall_started
+    upstream = upstreams.stats()
+    upstreams.stop()
+
+    stages = {}
+    for stage in ("geocode", "search", "reviews_ready", "match_ready", "first_result", "total"):
+        values = []
+        for outcome in outcomes:
+            value = outcome["timing"].get(stage)
+            values.extend(value if isinstance(value, list) else [] if value is None else [value])
+        stages[stage] = summarize(values)
+    latencies = [outcome["latency"] for outcome in outcomes]
+    counters = {}
+    for outcome in outcomes:
+        for key, value in outcome["counters"].items():
+            counters[key] = counters.get(key, 0) + value
+    return {
+        **summarize(latencies),
+        "throughput": searches / wall if wall else 0.0,
+        "wall_s": wall,
+        "results": sum(outcome["results"] for outcome in outcomes),
+        "errors": sum(outcome["errors"] for outcome in outcomes),
+        "stages": stages,
+        "upstream": {service: {"requests": stats["requests"], "errors": stats["errors"],
+                               "per_search": stats["requests"] / searches}
+                     for service, stats in upstream.items()},
+        "per_search": {key: value / searches for key, value in sorted(counters.items())},
+    }
+
+def print_report(report: dict):
+    print(f"\nEnd-to-end latency  p50 {report['p50']:.2f}s  p95 {report['p95']:.2f}s  p99 {report['p99']:.2f}s")
+    print(f"Throughput          {report['throughput']:.2f} searches/s ({report['wall_s']:.1f}s wall), "
+          f"{report['results']} results, {report['errors']} errors")
+    print(f"\n{'stage':<14} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}")
+    for stage, values in report["stages"].items():
+        print(f"{stage:<14} {values['p50']:>8.2f} {values['p95']:>8.2f} {values['p99']:>8.2f}")
+    print(f"\n{'upstream':<14} {'requests':>8} {'errors':>8} {'/search':>8}")
+    for service, stats in report["upstream"].items():
+        print(f"{service:<14} {stats['requests']:>8} {stats['errors']:>8} {stats['per_search']:>8.1f}")
+    if report.get("per_search"):
+        print(f"\n{'traced counter':<40} {'/search':>12}")
+        for key, value in report["per_search"].items():
+            print(f"{key:<40} {value:>12.1f}")
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for metric in ("p50", "p95", "p99"):
+        if report[metric] > baseline[metric] * tolerance:
+            regressions.append(f"{metric} {report[metric]:.2f}s > {baseline[metric]:.2f}s x {tolerance}")
+    if report["throughput"] < baseline["throughput"] / tolerance:
+        regressions.append(f"throughput {report['throughput']:.2f}/s < {baseline['throughput']:.2f}/s / {tolerance}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="default")
+    parser.add_argument("--searches", type=int, help="override the scenario's number of searches")
+    parser.add_argument("--concurrency", type=int, help="override the scenario's concurrent searches")
+    parser.add_argument("--update", action="store_true", help="store this run as the scenario's baseline")
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args()
+
+    with open(SCENARIOS_PATH, "r", encoding="utf-8") as f:
+        scenarios = yaml.safe_load(f)
+    scenario = dict(scenarios[args.scenario])
+    if args.searches:
+        scenario["searches"] = args.searches
+    if args.concurrency:
+        scenario["concurrency"] = args.concurrency
+
+    report = run_scenario(args.scenario, scenario)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    if args.update:
+        baselines[args.scenario] = {key: round(report[key], 3) for key in ("p50", "p95", "p99", "throughput")}
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline for '{args.scenario}' written to {BASELINE_PATH}")
+        return
+
+    baseline = baselines.get(args.scenario)
+    if baseline is None:
+        print(f"\nNo baseline for '{args.scenario}' yet; run with --update to store one.")
+        return
+    regressions = compare(report, baseline, float(scenario.get("tolerance", 1.3)))
+    if regressions:
+        print("\n❌ Regression against baseline:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+    print("\n✅ Within baseline tolerance")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Local stand-ins for Google Places, Nominatim, an OpenAI-compatible chat API and restaurant websites.
+
+Every service answers on one aiohttp server under its own prefix (/places, /nominatim, /openai/v1,
+/menus), with latency drawn from a log-normal distribution (given median and p99), an injected
+error rate and configurable response sizes. Responses are deterministic for a given seed.
+
+The benchmark runs them in their own process (UpstreamProcess), so building fake pages does not
+compete with the measured app for the GIL:
+
+    python benchmarks/fake_servers.py --port 8900 --services '{"openai": {"latency_ms": {"median": 300}}}'
+"""
+import sys
+import json
+import math
+import random
+import asyncio
+import hashlib
+import argparse
+import threading
+import subprocess
+import urllib.request
+from aiohttp import web
+
+DISHES = ["Chicken Burger", "Cheeseburger", "Vegan Burger", "Margherita Pizza", "Pepperoni Pizza",
+          "Salmon Nigiri", "California Roll", "Tonkotsu Ramen", "Pad Thai", "Caesar Salad", "Pierogi",
+          "Beef Tacos", "Falafel Wrap", "Spaghetti Carbonara", "Lasagne", "Tomato Soup", "Pho", "Kebab"]
+WORDS = ("tasty friendly fresh slow quick cozy crowded clean noisy portions service price value staff "
+         "atmosphere waiting delicious bland crispy spicy").split()
+TYPES = ["restaurant", "food", "point_of_interest", "meal_takeaway", "cafe", "bar"]
+
+class Service:
+    """Latency/error profile of one fake upstream, plus the counters the benchmark reports."""
+
+    def __init__(self, name: str, profile: dict, rng: random.Random):
+        self.name = name
+        self.profile = profile
+        latency = profile.get("latency_ms", {})
+        self.median = float(latency.get("median", 50)) / 1000
+        p99 = float(latency.get("p99", latency.get("median", 50) * 3)) / 1000
+        self.sigma = math.log(max(p99, self.median * 1.0001) / self.median) / 2.326 if self.median else 0.0
+        self.error_rate = float(profile.get("error_rate", 0.0))
+        self.rng = rng
+        self.stats = {"requests": 0, "errors": 0, "latency_s": 0.0}
+
+    async def respond(self, build) -> web.Response:
+        delay = self.median * math.exp(self.rng.gauss(0, self.sigma)) if self.median else 0.0
+        self.stats["requests"] += 1
+        self.stats["latency_s"] += delay
+        await asyncio.sleep(delay)
+        if self.rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"error": "injected failure"}, status=503)
+        return build()
+
+def seeded(*parts) -> random.Random:
+    return random.Random(hashlib.sha256("|".join(map(str, parts)).encode("utf-8")).hexdigest())
+
+def find_json(text: str, marker: str):
+    """Decodes the first JSON array after `marker` in a prompt."""
+    start = text.find("[", text.find(marker))
+    return json.JSONDecoder().raw_decode(text[start:])[0]
+
+def upstream_env(base_url: str) -> dict:
+    """Environment variables that point the app's clients at the fake server."""
+    return {
+        "PLACES_API_URL": f"{base_url}/places",
+        "NOMINATIM_URL": f"{base_url}/nominatim",
+        "OPENAI_API_BASE": f"{base_url}/openai/v1",
+        "OPENAI_API_KEY": "sk-fake",
+        "GOOGLE_MAPS_API_KEY": "fake",
+    }
+
+class FakeUpstreams:
+    def __init__(self, services: dict, seed: int = 0):
+        self.seed = seed
+        rng = random.Random(seed)
+        self.services = {name: Service(name, services.get(name, {}), random.Random(rng.random()))
+                         for name in ("places", "nominatim", "openai", "menus")}
+        self.base_url = None
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    # -------------------- Places --------------------
+    def _place(self, query: str, index: int, lat: float, lng: float) -> dict:
+        rng = seeded(self.seed, query, index)
+        place_id = hashlib.sha1(f"{query}|{index}".encode("utf-8")).hexdigest()[:20]
+        dish = rng.choice(DISHES)
+        return {
+            "place_id": place_id,
+            "name": f"{dish.split()[-1]} {rng.choice(['House', 'Bar', 'Corner', 'Kitchen', 'Bistro'])} {index}",
+            "types": rng.sample(TYPES, 3),
+            "rating": round(rng.uniform(3.2, 5.0), 1),
+            "user_ratings_total": int(rng.paretovariate(1.2) * 20),
+            "formatted_address": f"Fake Street {index + 1}",
+            "geometry": {"location": {"lat": lat + rng.uniform(-0.02, 0.02), "lng": lng + rng.uniform(-0.02, 0.02)}},
+            "website": f"{self.base_url}/menus/{place_id}",
+        }
+
+    async def textsearch(self, request: web.Request) -> web.Response:
+        profile = self.services["places"].profile
+        per_page, pages = int(profile.get("results", 20)), int(profile.get("pages", 1))
+
+        def build():
+            token = request.query.get("pagetoken")
+            if token:
+                query, location, page = token.rsplit("|", 2)
+                page = int(page)
+            else:
+                query, location, page = request.query.get("query", ""), request.query.get("location", "0,0"), 0
+            try:
+                lat, lng = (float(part) for part in location.split(","))
+            except ValueError:
+                lat, lng = 0.0, 0.0
+            results = [self._place(query, page * per_page + i, lat, lng) for i in range(per_page)]
+            body = {"status": "OK", "results": results}
+            if page + 1 < pages:
+                body["next_page_token"] = f"{query}|{location}|{page + 1}"
+            return web.json_response(body)
+        return await self.services["places"].respond(build)
+
+    async def details(self, request: web.Request) -> web.Response:
+        profile = self.services["places"].profile
+
+        def build():
+            place_id = request.query.get("place_id", "")
+            newest = request.query.get("reviews_sort") == "newest"
+            rng = seeded(self.seed, place_id)
+            reviews = []
+            for i in range(int(profile.get("reviews", 5))):
+                review_rng = seeded(self.seed, place_id, newest, i)
+                words = int(profile.get("review_words", 60))
+                reviews.append({
+                    "author_name": f"Reviewer {review_rng.randint(1, 10 ** 6)}",
+                    "time": 1700000000 + review_rng.randint(0, 10 ** 7),
+                    "rating": review_rng.randint(1, 5),
+                    "text": " ".join(review_rng.choice(WORDS + DISHES) for _ in range(words)),
+                })
+            result = {"reviews": reviews}
+            if request.query.get("fields") != "review":
+                result.update({
+                    "name": f"Place {place_id[:6]}",
+                    "rating": round(rng.uniform(3.2, 5.0), 1),
+                    "user_ratings_total": rng.randint(5, 3000),
+                    "formatted_address": f"Fake Street {rng.randint(1, 200)}",
+                    "price_level": rng.randint(1, 4),
+                    "opening_hours": {"weekday_text": ["Monday: 10:00 AM – 10:00 PM"]},
+                })
+            return web.json_response({"status": "OK", "result": result})
+        return await self.services["places"].respond(build)
+
+    # -------------------- Nominatim --------------------
+    async def nominatim_search(self, request: web.Request) -> web.Response:
+        def build():
+            rng = seeded(self.seed, request.query.get("q", ""))
+            return web.json_response([{"lat": str(rng.uniform(49, 54)), "lon": str(rng.uniform(14, 24)),
+                                       "display_name": request.query.get("q", "")}])
+        return await self.services["nominatim"].respond(build)
+
+    async def nominatim_reverse(self, request: web.Request) -> web.Response:
+        def build():
+            return web.json_response({"display_name": f"Fake Street, {request.query.get('lat')}"})
+        return await self.services["nominatim"].respond(build)
+
+    # -------------------- OpenAI-compatible chat --------------------
+    def _completion(self, messages: list) -> str:
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        rng = seeded(self.seed, prompt)
+        if "JSON list of candidate restaurants" in prompt:
+            candidates = find_json(prompt, "candidate restaurants")
+            return json.dumps([{"index": c["index"], "match": rng.random() < 0.5,
+                                "summary": f"{c['name']} serves {rng.choice(DISHES)}."} for c in candidates])
+        if "Translate every string in the following JSON array" in prompt:
+            return json.dumps([f"[t] {text}" for text in find_json(prompt, "JSON array")], ensure_ascii=False)
+        if "popular meals" in prompt:
+            return json.dumps([["🍽️", dish.split()[-1]] for dish in rng.sample(DISHES, 8)])
+        if "specific types of" in prompt:
+            return json.dumps(rng.sample(DISHES, 4))
+        words = int(self.services["openai"].profile.get("completion_words", 50))
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    async def chat(self, request: web.Request) -> web.Response:
+        body = await request.json()
+
+        def build():
+            content = self._completion(body.get("messages", []))
+            prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+            completion_tokens = len(content) // 4
+            return web.json_response({
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": 0,
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+        return await self.services["openai"].respond(build)
+
+    # -------------------- Restaurant websites --------------------
+    async def menu_page(self, request: web.Request) -> web.Response:
+        profile = self.services["menus"].profile
+
+        def build():
+            place_id = request.match_info["place_id"]
+            subpage = request.match_info.get("subpage")
+            rng = seeded(self.seed, place_id, subpage)
+            target = int(float(profile.get("page_kb", 40)) * 1024)
+            parts = ["<html><head><title>Restaurant</title><script>var tracking = 1;</script></head><body>",
+                     "<nav><a href='/'>Home</a></nav>"]
+            if not subpage:
+                parts.append(f"<a href='/menus/{place_id}/menu'>Menu</a>")
+            size = sum(map(len, parts))
+            while size < target:
+                item = (f"<div class='item'><h3>{rng.choice(DISHES)}</h3><p>{' '.join(rng.choices(WORDS, k=12))}</p>"
+                        f"<span>{rng.randint(15, 80)} zł</span></div>")
+                parts.append(item)
+                size += len(item)
+            parts.append("</body></html>")
+            return web.Response(text="".join(parts), content_type="text/html", charset="utf-8")
+        return await self.services["menus"].respond(build)
+
+    # -------------------- Lifecycle --------------------
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.add_routes([
+            web.get("/places/textsearch/json", self.textsearch),
+            web.get("/places/details/json", self.details),
+            web.get("/nominatim/search", self.nominatim_search),
+            web.get("/nominatim/reverse", self.nominatim_reverse),
+            web.post("/openai/v1/chat/completions", self.chat),
+            web.get("/menus/{place_id}", self.menu_page),
+            web.get("/menus/{place_id}/{subpage}", self.menu_page),
+            web.get("/_stats", self.stats_route),
+            web.post("/_reset", self.reset_route),
+        ])
+        return app
+
+    async def stats_route(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    async def reset_route(self, request: web.Request) -> web.Response:
+        self.reset_stats()
+        return web.json_response({})
+
+    def start(self, port: int = 0) -> str:
+        """Starts the server (on a free local port by default) in a background thread and returns its base URL."""
+        ready = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.app())
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, "127.0.0.1", port)
+            self._loop.run_until_complete(site.start())
+            self.base_url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.base_url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def env(self) -> dict:
+        return upstream_env(self.base_url)
+
+    def stats(self) -> dict:
+        return {name: dict(service.stats) for name, service in self.services.items()}
+
+    def reset_stats(self):
+        for service in self.services.values():
+            service.stats = {"requests": 0, "errors": 0, "latency_s": 0.0}
+
+class UpstreamProcess:
+    """FakeUpstreams in a child process, with the same start/stop/env/stats interface.
+
+    The child exits when its stdin closes, so it never outlives the benchmark.
+    """
+
+    def __init__(self, services: dict, seed: int = 0):
+        self.services = services
+        self.seed = seed
+        self.base_url = None
+        self._proc = None
+
+    def start(self) -> str:
+        self._proc = subprocess.Popen(
+            [sys.executable, __file__, "--seed", str(self.seed), "--services", json.dumps(self.services)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        self.base_url = self._proc.stdout.readline().strip()
+        if not self.base_url:
+            raise RuntimeError("fake upstream process failed to start")
+        return self.base_url
+
+    def stop(self):
+        if self._proc is None:
+            return
+        self._proc.stdin.close()
+        try:
+            self._proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        self._proc = None
+
+    def env(self) -> dict:
+        return upstream_env(self.base_url)
+
+    def stats(self) -> dict:
+        with urllib.request.urlopen(f"{self.base_url}/_stats") as response:
+            return json.load(response)
+
+    def reset_stats(self):
+        urllib.request.urlopen(urllib.request.Request(f"{self.base_url}/_reset", method="POST")).close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the fake upstreams until stdin closes.")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--services", default="{}", help="JSON object of per-service profiles")
+    args = parser.parse_args()
+
+    upstreams = FakeUpstreams(json.loads(args.services), seed=args.seed)
+    print(upstreams.start(port=args.port), flush=True)
+    sys.stdin.read()
+    upstreams.stop()
+
+if __name__ == "__main__":
+    main()
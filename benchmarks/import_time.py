@@ -0,0 +1,79 @@
+"""Startup import-time benchmark.
+
+Runs each entry point under `python -X importtime` in a fresh interpreter, reports the median
+cumulative import time and fails when a target exceeds its budget in import_budget.json or pulls
+in a module that must stay lazy.
+
+    python benchmarks/import_time.py            # check against the tracked budget
+    python benchmarks/import_time.py --update   # re-baseline budgets (1.5x the measured median)
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), "import_budget.json")
+
+def run_importtime(statement: str) -> dict:
+    """Returns {top-level module: cumulative microseconds} for root-level imports of the statement."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"`{statement}` failed:\n{proc.stderr[-2000:]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        modules[name[1:].rstrip()] = int(cumulative)  # nested imports keep their indentation
+    return modules
+
+def measure(statement: str, baseline: set, repeats: int) -> tuple:
+    totals, imported = [], set()
+    for _ in range(repeats):
+        modules = run_importtime(statement)
+        roots = {name: us for name, us in modules.items() if not name.startswith(" ") and name not in baseline}
+        totals.append(sum(roots.values()) / 1000)
+        imported = {name.strip().split(".")[0] for name in modules}
+    return statistics.median(totals), imported
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--update", action="store_true", help="write new budgets from this run")
+    args = parser.parse_args()
+
+    with open(BUDGET_PATH, "r", encoding="utf-8") as f:
+        budgets = json.load(f)
+    baseline = {name for name in run_importtime("pass") if not name.startswith(" ")}
+
+    failures = []
+    print(f"{'target':<12} {'median ms':>10} {'budget ms':>10}  status")
+    for target, spec in budgets.items():
+        median_ms, imported = measure(spec["statement"], baseline, args.repeats)
+        leaked = sorted(set(spec.get("lazy", [])) & imported)
+        status = "ok"
+        if leaked:
+            status = f"eager imports: {', '.join(leaked)}"
+        elif median_ms > spec["budget_ms"] and not args.update:
+            status = "over budget"
+        if status != "ok":
+            failures.append(target)
+        print(f"{target:<12} {median_ms:>10.1f} {spec['budget_ms']:>10}  {status}")
+        if args.update:
+            spec["budget_ms"] = round(median_ms * 1.5)
+
+    if args.update:
+        with open(BUDGET_PATH, "w", encoding="utf-8") as f:
+            json.dump(budgets, f, indent=2)
+            f.write("\n")
+        print(f"Budgets written to {BUDGET_PATH}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""Stand-ins for `streamlit` and `streamlit_geolocation`, so the import benchmark measures what
+streamlit_app.py itself imports rather than the Streamlit runtime."""
+import sys
+import types
+
+def _passthrough(fn=None, **kwargs):
+    return fn if fn is not None else _passthrough
+
+def _noop(*args, **kwargs):
+    return None
+
+streamlit = types.ModuleType("streamlit")
+streamlit.cache_resource = streamlit.cache_data = _passthrough
+streamlit.__getattr__ = lambda name: _noop
+geolocation = types.ModuleType("streamlit_geolocation")
+geolocation.streamlit_geolocation = _noop
+
+sys.modules.setdefault("streamlit", streamlit)
+sys.modules.setdefault("streamlit_geolocation", geolocation)
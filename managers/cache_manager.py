@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from managers.config_manager import get_config, get_setting
+from managers.tracing import count
+
+# CACHE_DIR in the environment moves every cache, e.g. to give benchmarks a cold start.
+CACHE_DIR = os.path.abspath(
+    get_config("CACHE_DIR") or os.path.join(os.path.dirname(__file__), "..", get_setting("cache.dir", ".cache"))
+)
+
+class TTLCache:
+    """In-memory LRU with per-entry expiry, optionally backed by a SQLite table on disk.
+
+    Values must be JSON-serializable; every hit returns a fresh copy so callers can mutate it freely.
+    The disk table is bounded by max_entries too: every SWEEP_EVERY writes, expired rows and the
+    oldest-written rows beyond max_entries are deleted. `stats` totals are also reported as cache_*
+    counters to the trace and /metrics.
+    """
+
+    SWEEP_EVERY = 100
+
+    def __init__(self, name: str, max_entries: int = 1000, default_ttl: float = 3600, persist: bool = True):
+        self.name = name
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "disk_hits": 0,
+                      "disk_evictions": 0}
+        self._writes = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._open_db() if persist else None
+
+    def _open_db(self):
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            db = sqlite3.connect(os.path.join(CACHE_DIR, f"{self.name}.sqlite3"), check_same_thread=False)
+            db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)")
+            self._sweep(db)
+            return db
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache '{self.name}' running in memory only: {e}")
+            return None
+
+    def get(self, key: str, default=None, record: bool = True):
+        """`record=False` leaves hit/miss stats alone, for re-checks of a lookup that was already counted."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] < now:
+                del self._memory[key]
+                self.stats["expirations"] += 1
+                count("cache_expirations", cache=self.name)
+                entry = None
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at >= ?", (key, now)
+                ).fetchone()
+                if row:
+                    entry = (row[1], row[0])
+                    self._store(key, entry)
+                    self.stats["disk_hits"] += 1
+            if entry is not None:
+                self._memory.move_to_end(key)
+            if record:
+                self.stats["hits" if entry is not None else "misses"] += 1
+        if record:
+            count("cache_hits" if entry is not None else "cache_misses", cache=self.name)
+        return default if entry is None else json.loads(entry[1])
+
+    def set(self, key: str, value, ttl: float = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        entry = (time.time() + ttl, json.dumps(value))
+        with self._lock:
+            self._store(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                                 (key, entry[1], entry[0]))
+                self._writes += 1
+                if self._writes % self.SWEEP_EVERY == 0:
+                    self._sweep(self._db)
+                self._db.commit()
+
+    def _sweep(self, db):
+        # INSERT OR REPLACE gives a rewritten key a new rowid, so the lowest rowids are the oldest writes.
+        db.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+        trimmed = db.execute("DELETE FROM entries WHERE rowid IN "
+                             "(SELECT rowid FROM entries ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                             (self.max_entries,)).rowcount
+        db.commit()
+        if trimmed > 0:
+            self.stats["disk_evictions"] += trimmed
+            count("cache_disk_evictions", trimmed, cache=self.name)
+
+    def _store(self, key: str, entry: tuple):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+            count("cache_evictions", cache=self.name)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(name: str, **kwargs) -> TTLCache:
+    """Returns the process-wide cache with the given name, creating it on first use."""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(name, **kwargs)
+        return _caches[name]
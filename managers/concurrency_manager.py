@@ -0,0 +1,241 @@
+import copy
+import time
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from functools import lru_cache
+from managers.config_manager import get_setting
+from managers.tracing import span, count
+
+DEFAULT_LIMIT = 4
+
+_limiters = {}
+_schedulers = {}
+_lock = threading.Lock()
+
+# Identifies the search an upstream call belongs to, so quota is shared fairly between searches.
+_flow = contextvars.ContextVar("flow", default=None)
+
+def set_flow(flow_id):
+    _flow.set(flow_id)
+
+def get_limiter(backend: str) -> threading.BoundedSemaphore:
+    """Returns the process-wide semaphore capping in-flight calls to a backend (google, openai, websites)."""
+    with _lock:
+        if backend not in _limiters:
+            size = int(get_setting(f"concurrency.{backend}", DEFAULT_LIMIT))
+            _limiters[backend] = threading.BoundedSemaphore(max(1, size))
+        return _limiters[backend]
+
+def get_scheduler(backend: str):
+    """Returns the process-wide FairScheduler for a backend's quota, or None when quotas.<backend> is not set."""
+    with _lock:
+        if backend not in _schedulers:
+            quota = get_setting(f"quotas.{backend}")
+            _schedulers[backend] = FairScheduler(
+                float(quota["rate_per_second"]), float(quota.get("burst", quota["rate_per_second"]))
+            ) if quota else None
+        return _schedulers[backend]
+
+@contextmanager
+def limit(backend: str):
+    scheduler = get_scheduler(backend)
+    if scheduler is not None:
+        from tools.http_transport import DeadlineExceeded, remaining_time
+        # Waiting for quota past the search deadline is pointless; fail fast instead.
+        with span("quota_wait", backend=backend):
+            acquired = scheduler.acquire(_flow.get(), timeout=remaining_time())
+        if not acquired:
+            raise DeadlineExceeded(f"no {backend} quota available before the deadline")
+    with get_limiter(backend):
+        yield
+
+class TokenBucket:
+    """Rate limiter; callers that find the bucket empty queue up and sleep until a token is refilled."""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Takes one token, waiting at most `timeout` seconds (forever when None). Returns False on timeout."""
+        started = time.monotonic()
+        if not self._lock.acquire(timeout=-1 if timeout is None else max(0, timeout)):
+            return False
+        try:
+            self._refill()
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0
+            if timeout is not None and wait > timeout - (time.monotonic() - started):
+                return False
+            if wait:
+                time.sleep(wait)
+                self._refill()
+            self._tokens -= 1
+            return True
+        finally:
+            self._lock.release()
+
+class FairScheduler:
+    """Token bucket shared by every search; when tokens run short, waiting searches are served round-robin.
+
+    Without this a search that fans out to ten places would queue ten calls ahead of a search that
+    just arrived. Calls of one search keep their order; searches take turns.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._flows = OrderedDict()  # flow -> deque of waiting tickets, in turn order
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def waiting(self) -> int:
+        with self._cond:
+            return sum(len(tickets) for tickets in self._flows.values())
+
+    def acquire(self, flow=None, timeout: float = None) -> bool:
+        """Takes one token for `flow`, waiting at most `timeout` seconds (forever when None)."""
+        ticket = object()
+        expires_at = None if timeout is None else time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            self._flows.setdefault(flow, deque()).append(ticket)
+            while True:
+                self._refill()
+                tickets = next(iter(self._flows.values()))
+                if tickets[0] is ticket and self._tokens >= 1:
+                    self._tokens -= 1
+                    tickets.popleft()
+                    # This search had its turn; the next waiting search goes first.
+                    self._flows.move_to_end(flow)
+                    if not tickets:
+                        del self._flows[flow]
+                    self._cond.notify_all()
+                    return True
+
+                wait = (1 - self._tokens) / self.rate if self._tokens < 1 else None
+                if expires_at is not None:
+                    remaining = expires_at - time.monotonic()
+                    if remaining <= 0:
+                        self._flows[flow].remove(ticket)
+                        if not self._flows[flow]:
+                            del self._flows[flow]
+                        self._cond.notify_all()
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+@lru_cache(maxsize=1)
+def _timeout_errors() -> tuple:
+    import requests
+    from tools.http_transport import DeadlineExceeded
+    errors = [DeadlineExceeded, requests.Timeout]
+    try:  # the OpenAI client (LLM and embedding calls) times out through httpx
+        import httpx
+        errors.append(httpx.TimeoutException)
+        import openai
+        errors.append(openai.APITimeoutError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+def _ran_out_of_time(error: Exception) -> bool:
+    """True for failures caused by the caller's deadline or a request timeout rather than by the upstream answer."""
+    return isinstance(error, _timeout_errors())
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one; every waiter gets the leader's result.
+
+    Waiters receive a deep copy of a snapshot the leader's caller never sees, so any caller may
+    mutate what it gets back. They wait no longer than their own search deadline, and when the
+    leader ran out of *its* time (deadline or timeout) a waiter with time left retries, becoming
+    the new leader. `stats` counts calls, leaders (work
+    actually done), collapsed calls (duplicates that waited instead) and such retries; the same
+    counts go to the trace and /metrics as single_flight_* counters.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.stats = {"calls": 0, "leaders": 0, "collapsed": 0, "errors": 0, "retries": 0}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn, *args, **kwargs):
+        from tools.http_transport import DeadlineExceeded, remaining_time
+        retry = False
+        while True:
+            with self._lock:
+                self.stats["calls"] += not retry
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self.stats["leaders"] += 1
+                else:
+                    self.stats["collapsed"] += 1
+
+            if leader:
+                count("single_flight_leaders", group=self.name)
+                return self._lead(key, call, fn, *args, **kwargs)
+
+            with span("single_flight_wait", group=self.name):
+                finished = call.done.wait(remaining_time())
+            remaining = remaining_time()
+            if finished and call.error is not None and _ran_out_of_time(call.error) and (remaining is None or remaining > 0):
+                with self._lock:
+                    self.stats["retries"] += 1
+                    self.stats["collapsed"] -= 1  # that wait saved no upstream call after all
+                count("single_flight_retries", group=self.name)
+                retry = True
+                continue
+            count("single_flight_collapsed", group=self.name)
+            if not finished:
+                raise DeadlineExceeded("search deadline exceeded while waiting for a shared call")
+            if call.error is None:
+                return copy.deepcopy(call.result)
+            raise call.error
+
+    def _lead(self, key: str, call: _Call, fn, *args, **kwargs):
+        try:
+            result = fn(*args, **kwargs)
+            call.result = copy.deepcopy(result)  # the waiters' private snapshot; the leader keeps the original
+            return result
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self.stats["errors"] += 1
+            count("single_flight_errors", group=self.name)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+_flights = {}
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Returns the process-wide SingleFlight for one kind of work (places, pages, llm, geocoding)."""
+    with _lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight(name)
+        return _flights[name]
@@ -1,8 +1,25 @@
 import os
+import yaml
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+CONFIG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "config", "config.yaml"))
+
 def get_config(key: str, default=None):
     return os.getenv(key, default)
 
+@lru_cache(maxsize=1)
+def load_settings() -> dict:
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+def get_setting(path: str, default=None):
+    """Reads a dotted key (e.g. "concurrency.google") from config/config.yaml."""
+    value = load_settings()
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
@@ -0,0 +1,76 @@
+import json
+import hashlib
+from langchain.schema import AIMessage
+from managers.cache_manager import get_cache
+from managers.concurrency_manager import limit, get_single_flight
+from managers.config_manager import get_setting
+from managers.tracing import span, count
+from tools.http_transport import check_deadline
+
+_in_flight = get_single_flight("llm")
+
+def prompt_key(messages: list, model: str, temperature) -> str:
+    payload = {
+        "model": model,
+        "temperature": temperature,
+        "messages": [[getattr(m, "type", type(m).__name__), m.content] for m in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def record_usage(namespace: str, messages: list, response):
+    """Counts the call and its tokens, as reported by the API or estimated at ~4 characters per token."""
+    usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    prompt_tokens = usage.get("prompt_tokens") or sum(len(str(m.content)) for m in messages) // 4
+    completion_tokens = usage.get("completion_tokens") or len(str(response.content)) // 4
+    count("llm_calls", prompt=namespace)
+    count("llm_prompt_tokens", prompt_tokens, prompt=namespace)
+    count("llm_completion_tokens", completion_tokens, prompt=namespace)
+
+def default_llm_cache():
+    if not get_setting("cache.llm.enabled", True):
+        return None
+    return get_cache(
+        "llm",
+        max_entries=int(get_setting("cache.llm.max_entries", 5000)),
+        persist=bool(get_setting("cache.llm.persist", True)),
+    )
+
+class CachedChatModel:
+    """Wraps a chat model so identical (messages, model, temperature) calls skip the network round trip."""
+
+    def __init__(self, llm, namespace: str, cache=None):
+        self.llm = llm
+        self.namespace = namespace
+        self.cache = cache if cache is not None else default_llm_cache()
+        self.ttl = float(get_setting(f"cache.llm.ttl.{namespace}", 86400))
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.llm, "model_name", None) or getattr(self.llm, "model", "")
+
+    @property
+    def temperature(self):
+        return getattr(self.llm, "temperature", None)
+
+    def invoke(self, messages: list):
+        check_deadline()
+        key = prompt_key(messages, self.model_name, self.temperature)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return AIMessage(content=cached)
+        # Identical prompts from concurrent searches share one completion.
+        return _in_flight.do(key, self._complete, key, messages)
+
+    def _complete(self, key: str, messages: list):
+        if self.cache is not None:
+            cached = self.cache.get(key, record=False)
+            if cached is not None:
+                return AIMessage(content=cached)
+
+        with limit("openai"), span("llm", prompt=self.namespace):
+            response = self.llm.invoke(messages)
+        record_usage(self.namespace, messages, response)
+        if self.cache is not None:
+            self.cache.set(key, response.content, ttl=self.ttl)
+        return response
@@ -1,14 +1,131 @@
 
 import yaml
 import os
+import time
+import string
+import threading
+from managers.config_manager import get_setting
+
+# Placeholders each prompt's template must use; checked when the registry loads.
+EXPECTED_PLACEHOLDERS = {
+    "matcher.yaml": {"query", "name", "types"},
+    "menu_match.yaml": {"query", "name", "menu_items"},
+    "batch_match.yaml": {"query", "candidates"},
+    "review.yaml": {"reviews"},
+    "review_update.yaml": {"summary", "reviews"},
+    "review_reduce.yaml": {"summaries"},
+    "translator.yaml": {"text", "language"},
+    "translator_batch.yaml": {"texts", "language"},
+    "suggest_general.yaml": set(),
+    "suggest_variants.yaml": {"meal"},
+}
+
+def is_english(language: str = None) -> bool:
+    return not language or language.lower() in ["english", "en"]
+
+def placeholders(text: str) -> set:
+    return {field for _, field, _, _ in string.Formatter().parse(text) if field}
+
+class PromptTemplate:
+    """A validated prompt file, ready to format without touching the disk."""
+
+    def __init__(self, name: str, data: dict):
+        if not isinstance(data, dict) or not all(isinstance(data.get(key), str) for key in ("system", "template")):
+            raise ValueError(f"Prompt {name} needs string 'system' and 'template' entries")
+        self.name = name
+        self.data = data
+        self.system = data["system"]
+        self.template = data["template"]
+        self.language = data.get("language")
+        self.placeholders = placeholders(self.template)
+
+        expected = EXPECTED_PLACEHOLDERS.get(name)
+        if expected is not None and self.placeholders != expected:
+            raise ValueError(f"Prompt {name} uses placeholders {sorted(self.placeholders)}, expected {sorted(expected)}")
+        if self.language is not None and placeholders(self.language) != {"language"}:
+            raise ValueError(f"Prompt {name} 'language' entry must use exactly the {{language}} placeholder")
+        self._systems = {}
+
+    def format(self, **values) -> str:
+        missing = self.placeholders - values.keys()
+        if missing:
+            raise KeyError(f"Prompt {self.name} is missing values for {sorted(missing)}")
+        return self.template.format(**values)
+
+    def language_instruction(self, language: str = None) -> str:
+        if is_english(language) or not self.language:
+            return ""
+        return self.language.format(language=language)
+
+    def system_for(self, language: str = None) -> str:
+        """System prompt with the `language` instruction appended for non-English answers (memoized)."""
+        if language not in self._systems:
+            instruction = self.language_instruction(language)
+            self._systems[language] = f"{self.system.rstrip()}\n{instruction}" if instruction else self.system
+        return self._systems[language]
+
+    def __getitem__(self, key: str):
+        return self.data[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.data
 
 class PromptManager:
+    """Process-wide prompt registry: every file in prompts/ is parsed and validated once per directory.
+
+    A background watcher reloads a file only when its mtime changes, so lookups never touch the disk.
+    """
+
+    _registries = {}
+    _lock = threading.Lock()
+
     def __init__(self, base_dir: str = None):
         if base_dir is None:
             base_dir = os.path.join(os.path.dirname(__file__), "..", "prompts")
         self.base_dir = os.path.abspath(base_dir)
+        self.reload_interval = float(get_setting("prompts.reload_interval", 5))
+        with PromptManager._lock:
+            if self.base_dir not in PromptManager._registries:
+                registry = {"prompts": {}}
+                self._refresh(registry, strict=True)
+                PromptManager._registries[self.base_dir] = registry
+                if self.reload_interval > 0:
+                    threading.Thread(target=self._watch, args=(registry,), daemon=True).start()
+        self._registry = PromptManager._registries[self.base_dir]
+
+    def get(self, file_name: str) -> PromptTemplate:
+        try:
+            return self._registry["prompts"][file_name][1]
+        except KeyError:
+            raise FileNotFoundError(f"Prompt {file_name} not found in {self.base_dir}")
 
     def load_prompt(self, file_name: str) -> dict:
-        path = os.path.join(self.base_dir, file_name)
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+        return self.get(file_name).data
+
+    def _refresh(self, registry: dict, strict: bool = False):
+        prompts = dict(registry["prompts"])
+        names = {name for name in os.listdir(self.base_dir) if name.endswith((".yaml", ".yml"))}
+        for name in set(prompts) - names:
+            del prompts[name]
+        for name in names:
+            path = os.path.join(self.base_dir, name)
+            mtime = os.path.getmtime(path)
+            if name in prompts and prompts[name][0] == mtime:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    prompts[name] = (mtime, PromptTemplate(name, yaml.safe_load(f)))
+            except (OSError, yaml.YAMLError, ValueError) as e:
+                if strict:
+                    raise
+                # A broken edit must not take down running searches; keep serving the last good version.
+                print(f"⚠️ Keeping previous version of prompt {name}: {e}")
+        registry["prompts"] = prompts
+
+    def _watch(self, registry: dict):
+        while True:
+            time.sleep(self.reload_interval)
+            try:
+                self._refresh(registry)
+            except OSError as e:
+                print(f"⚠️ Could not check prompts for changes: {e}")
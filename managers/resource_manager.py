@@ -0,0 +1,46 @@
+import threading
+from managers.config_manager import get_config, get_setting
+
+# One instance of each client per process, shared by every search, session and thread.
+_resources = {}
+_lock = threading.RLock()
+
+def _shared(key, factory):
+    with _lock:
+        if key not in _resources:
+            _resources[key] = factory()
+        return _resources[key]
+
+def get_places_tool(api_key: str = None):
+    from tools.google_places_tool import GooglePlacesTool
+    api_key = api_key or get_config("GOOGLE_MAPS_API_KEY")
+    return _shared(("places", api_key), lambda: GooglePlacesTool(api_key))
+
+def get_chat_model(namespace: str, temperature: float):
+    """Cached, thread-safe chat client for one agent namespace (match, review, translate, suggest)."""
+    def build():
+        from langchain_community.chat_models import ChatOpenAI
+        from managers.llm_cache import CachedChatModel
+        llm = ChatOpenAI(temperature=temperature, request_timeout=get_setting("http.timeouts.openai", 30))
+        return CachedChatModel(llm, namespace)
+    return _shared(("llm", namespace, temperature), build)
+
+def get_geocoder():
+    from tools.geocoding_tool import GeocodingTool
+    return _shared("geocoder", GeocodingTool)
+
+def get_workflow():
+    from workflow.meal_recommendation_workflow import MealRecommendationWorkflow
+    return _shared("workflow", MealRecommendationWorkflow)
+
+def get_suggester():
+    from agents.meal_suggester_agent import MealSuggesterAgent
+    return _shared("suggester", MealSuggesterAgent)
+
+def get_suggestion_catalog():
+    from managers.suggestion_catalog import SuggestionCatalog
+    return _shared("suggestion_catalog", lambda: SuggestionCatalog(get_suggester))
+
+def get_vector_index():
+    from tools.vector_index import VectorIndex
+    return _shared("vector_index", VectorIndex)
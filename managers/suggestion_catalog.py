@@ -0,0 +1,117 @@
+import os
+import time
+import queue
+import threading
+from functools import lru_cache
+import yaml
+from managers.cache_manager import get_cache
+from managers.config_manager import get_setting
+
+STATIC_CATALOG_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "suggestions.yaml")
+
+@lru_cache()
+def load_static_catalog() -> dict:
+    try:
+        with open(STATIC_CATALOG_PATH, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as e:
+        print(f"⚠️ Could not load the bundled suggestion catalog: {e}")
+        data = {}
+    variants = {name.lower(): items for name, items in (data.get("variants") or {}).items()}
+    return {"general": data.get("general") or [], "variants": variants}
+
+def _language_key(language: str = None) -> str:
+    return (language or "English").strip().lower()
+
+class SuggestionCatalog:
+    """Meal ideas served from a local store; the LLM is only ever called by a background worker.
+
+    Reads return the stored catalog (or the bundled one) immediately and queue a refresh when the
+    entry is missing or older than `suggestions.refresh_interval`. The worker also re-sweeps every
+    configured language on that schedule, so sessions never wait on a chat completion.
+    """
+
+    def __init__(self, suggester_factory, cache=None, start: bool = True):
+        self.suggester_factory = suggester_factory
+        self.refresh_interval = float(get_setting("suggestions.refresh_interval", 86400))
+        self.languages = get_setting("suggestions.languages", ["English"])
+        self.cache = cache if cache is not None else get_cache(
+            "suggestions", max_entries=1000, default_ttl=float(get_setting("suggestions.keep_ttl", 2592000))
+        )
+        self._suggester = None
+        self._jobs = queue.Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+        if start:
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def general(self, language: str = None) -> list:
+        entry = self._entry(("general", _language_key(language)))
+        if entry is not None:
+            return entry["items"]
+        return load_static_catalog()["general"]
+
+    def variants(self, meal: str, language: str = None) -> list:
+        entry = self._entry(("variants", _language_key(language), meal.strip().lower()))
+        if entry is not None:
+            return entry["items"]
+        return load_static_catalog()["variants"].get(meal.strip().lower(), [])
+
+    def _entry(self, job: tuple):
+        entry = self.cache.get(self._key(job))
+        if entry is None or self._is_stale(entry):
+            self._schedule(job)
+        return entry
+
+    def _key(self, job: tuple) -> str:
+        return ":".join(job)
+
+    def _is_stale(self, entry: dict) -> bool:
+        return time.time() - entry["updated"] >= self.refresh_interval
+
+    def _schedule(self, job: tuple):
+        with self._lock:
+            if job in self._queued:
+                return
+            self._queued.add(job)
+        self._jobs.put(job)
+
+    def _work(self):
+        next_sweep = time.monotonic()
+        while True:
+            if time.monotonic() >= next_sweep:
+                for language in self.languages:
+                    self._schedule(("general", _language_key(language)))
+                next_sweep = time.monotonic() + self.refresh_interval
+            try:
+                job = self._jobs.get(timeout=max(0.0, next_sweep - time.monotonic()))
+            except queue.Empty:
+                continue
+            try:
+                self._refresh(job)
+            except Exception as e:
+                # Readers keep getting the stored or bundled catalog; the next read or sweep retries.
+                print(f"⚠️ Could not refresh suggestions {self._key(job)}: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(job)
+
+    def _refresh(self, job: tuple):
+        entry = self.cache.get(self._key(job))
+        if entry is None or self._is_stale(entry):
+            if self._suggester is None:
+                self._suggester = self.suggester_factory()
+            if job[0] == "general":
+                items = self._suggester.get_general_suggestions(job[1])
+            else:
+                items = self._suggester.get_sub_suggestions(job[2], job[1])
+            if not items:
+                print(f"⚠️ No usable suggestions for {self._key(job)}, keeping the previous catalog")
+                return
+            entry = {"items": items, "updated": time.time()}
+            self.cache.set(self._key(job), entry)
+
+        if job[0] == "general":
+            # Precompute the variants of every category so a click never waits on the LLM.
+            for _, name in entry["items"]:
+                self._schedule(("variants", job[1], name.strip().lower()))
@@ -0,0 +1,194 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from itertools import count as _ids
+
+# Upper bounds (seconds) of the span duration histogram buckets in the Prometheus export.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+MAX_SPANS = 5000
+
+_trace = contextvars.ContextVar("trace", default=None)
+_span = contextvars.ContextVar("span", default=None)
+_span_ids = _ids(1)
+
+class Metrics:
+    """Process-wide counters and span-duration histograms, exported in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name: str, value: float, labels: dict):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, span_name: str, seconds: float):
+        with self._lock:
+            hist = self.histograms.setdefault(span_name, {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += seconds
+            hist["count"] += 1
+
+    def prometheus_text(self, prefix: str = "mealfinder") -> str:
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = {name: dict(hist, buckets=list(hist["buckets"])) for name, hist in self.histograms.items()}
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_labels(dict(labels))} {value:g}")
+
+        metric = f"{prefix}_span_seconds"
+        if histograms:
+            lines.append(f"# TYPE {metric} histogram")
+        for name, hist in sorted(histograms.items()):
+            for bound, value in zip(BUCKETS, hist["buckets"]):
+                lines.append(f"{metric}_bucket{_labels({'span': name, 'le': f'{bound:g}'})} {value}")
+            lines.append(f"{metric}_bucket{_labels({'span': name, 'le': '+Inf'})} {hist['count']}")
+            lines.append(f"{metric}_sum{_labels({'span': name})} {hist['sum']:.6f}")
+            lines.append(f"{metric}_count{_labels({'span': name})} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+METRICS = Metrics()
+
+class Trace:
+    """Spans and counters of one search. Worker threads add to it through the copied context."""
+
+    def __init__(self, name: str, /, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started = time.monotonic()
+        self.ended = None
+        self.spans = []
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, span: dict):
+        with self._lock:
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append(span)
+
+    def inc(self, key: str, value: float):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def finish(self):
+        if self.ended is None:
+            self.ended = time.monotonic()
+
+    def cache_hit_rates(self) -> dict:
+        rates = {}
+        for key, hits in self.counters.items():
+            if key.startswith("cache_hits:"):
+                name = key.split(":", 1)[1]
+                misses = self.counters.get(f"cache_misses:{name}", 0)
+                rates[name] = hits / (hits + misses) if hits + misses else 0.0
+        for key, misses in self.counters.items():
+            if key.startswith("cache_misses:"):
+                rates.setdefault(key.split(":", 1)[1], 0.0)
+        return rates
+
+    def stage_totals(self) -> dict:
+        """Per span name: how often it ran, total and longest duration in milliseconds."""
+        totals = {}
+        for span in self.spans:
+            entry = totals.setdefault(span["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += span["duration_ms"]
+            entry["max_ms"] = max(entry["max_ms"], span["duration_ms"])
+        return totals
+
+    def to_dict(self) -> dict:
+        end = self.ended if self.ended is not None else time.monotonic()
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start_ms"])
+            counters = dict(self.counters)
+        return {
+            "name": self.name,
+            "attrs": self.attrs,
+            "duration_ms": round((end - self.started) * 1000, 2),
+            "spans": spans,
+            "counters": counters,
+            "cache_hit_rates": self.cache_hit_rates(),
+            "stages": self.stage_totals(),
+        }
+
+    def format_summary(self) -> str:
+        data = self.to_dict()
+        lines = [f"⏱️ {self.name} took {data['duration_ms']:.0f} ms",
+                 f"{'stage':<24} {'count':>6} {'total ms':>10} {'max ms':>10}"]
+        for name, entry in sorted(data["stages"].items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(f"{name:<24} {entry['count']:>6} {entry['total_ms']:>10.1f} {entry['max_ms']:>10.1f}")
+        if data["counters"]:
+            lines.append("")
+            for key, value in sorted(data["counters"].items()):
+                lines.append(f"{key:<48} {value:>10g}")
+        if data["cache_hit_rates"]:
+            lines.append("")
+            for name, rate in sorted(data["cache_hit_rates"].items()):
+                lines.append(f"cache hit rate {name:<33} {rate:>9.0%}")
+        return "\n".join(lines)
+
+def start_trace(name: str, /, **attrs) -> Trace:
+    """Starts a trace in the current context; stages called from here (and copied contexts) record into it."""
+    trace = Trace(name, **attrs)
+    _trace.set(trace)
+    _span.set(None)
+    return trace
+
+def current_trace():
+    return _trace.get()
+
+@contextmanager
+def span(name: str, /, **attrs):
+    """Times a stage. Spans nest through the context, so per-place work appears under its place span."""
+    span_id = next(_span_ids)
+    parent = _span.get()
+    token = _span.set(span_id)
+    started = time.monotonic()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _span.reset(token)
+        elapsed = time.monotonic() - started
+        METRICS.observe(name, elapsed)
+        trace = _trace.get()
+        if trace is not None:
+            record = {"id": span_id, "parent": parent, "name": name,
+                      "start_ms": round((started - trace.started) * 1000, 2),
+                      "duration_ms": round(elapsed * 1000, 2), "thread": threading.current_thread().name}
+            if attrs:
+                record["attrs"] = attrs
+            if error:
+                record["error"] = error
+            trace.add_span(record)
+
+def count(name: str, value: float = 1, /, **labels):
+    """Adds to a process-wide counter and to the current trace, if any (keyed "name:label,...")."""
+    METRICS.inc(name, value, labels)
+    trace = _trace.get()
+    if trace is not None:
+        key = name if not labels else f"{name}:{','.join(str(v) for _, v in sorted(labels.items()))}"
+        trace.inc(key, value)
+
+def prometheus_text() -> str:
+    return METRICS.prometheus_text()
@@ -0,0 +1,238 @@
+import warnings
+warnings.filterwarnings("ignore")
+import json
+import uuid
+import asyncio
+import threading
+import argparse
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from managers.config_manager import get_setting
+from managers.concurrency_manager import set_flow
+from managers.resource_manager import get_workflow, get_geocoder, get_suggestion_catalog
+from managers.tracing import prometheus_text
+from tools.geo_utils import parse_location
+
+class Overloaded(Exception):
+    pass
+
+class AdmissionController:
+    """Caps concurrent searches and the queue in front of them; anything beyond is rejected at once.
+
+    Runs on the event loop only, so plain counters are enough.
+    """
+
+    def __init__(self, max_active: int, max_queued: int, queue_timeout: float):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.stats = {"admitted": 0, "shed": 0, "queue_timeouts": 0}
+        self._slots = asyncio.Semaphore(max_active)
+
+    @asynccontextmanager
+    async def admit(self):
+        if self.active + self.waiting >= self.max_active + self.max_queued:
+            self.stats["shed"] += 1
+            raise Overloaded("too many searches in progress")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats["queue_timeouts"] += 1
+            raise Overloaded("queued too long")
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.stats["admitted"] += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+def overloaded_response(reason: str) -> web.Response:
+    retry_after = str(int(get_setting("service.retry_after", 2)))
+    return web.json_response({"error": "overloaded", "reason": reason}, status=429,
+                             headers={"Retry-After": retry_after})
+
+async def request_params(request: web.Request) -> dict:
+    params = dict(request.query)
+    if request.method == "POST" and request.can_read_body:
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            raise web.HTTPBadRequest(text="Body must be JSON")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(text="Body must be a JSON object")
+        params.update(body)
+    return params
+
+def run_blocking(request: web.Request, fn, *args):
+    """Runs workflow code on the shared thread pool under the request's flow id, so upstream quotas treat it as one search."""
+    flow = request.setdefault("flow", uuid.uuid4().hex)
+
+    def call():
+        set_flow(flow)
+        return fn(*args)
+    return asyncio.get_running_loop().run_in_executor(request.app["executor"], call)
+
+async def resolve_location(request: web.Request, location: str) -> str:
+    if parse_location(location):
+        return location
+    return await run_blocking(request, get_geocoder().geocode, location)
+
+async def search(request: web.Request) -> web.StreamResponse:
+    params = await request_params(request)
+    meal, location = str(params.get("meal", "")).strip(), str(params.get("location", "")).strip()
+    if not meal or not location:
+        raise web.HTTPBadRequest(text="Both 'meal' and 'location' are required")
+    try:
+        radius = int(params["radius"]) if params.get("radius") else None
+        deadline = float(params["deadline"]) if params.get("deadline") else None
+    except ValueError:
+        raise web.HTTPBadRequest(text="'radius' and 'deadline' must be numbers")
+    language = params.get("language") or "English"
+    stream = str(params.get("stream", "")).lower() in ("1", "true", "yes")
+    with_trace = str(params.get("trace", "")).lower() in ("1", "true", "yes")
+
+    try:
+        async with request.app["admission"].admit():
+            coordinates = await resolve_location(request, location)
+            if not coordinates:
+                return web.json_response({"error": "location not found"}, status=404)
+            workflow = get_workflow()
+            if not stream:
+                results, trace = await run_blocking(request, collect_search, workflow, meal, coordinates,
+                                                    radius, deadline, language)
+                body = {"meal": meal, "location": coordinates, "results": results}
+                if with_trace:
+                    body["trace"] = trace
+                return web.json_response(body)
+            return await stream_search(request, workflow, meal, coordinates, radius, deadline, language)
+    except Overloaded as e:
+        return overloaded_response(str(e))
+
+def collect_search(workflow, meal, coordinates, radius, deadline, language) -> tuple:
+    """Like workflow.run, but also keeps the search's trace."""
+    results, trace = {}, None
+    for event in workflow.run_iter(meal, coordinates, radius=radius, deadline=deadline, language=language):
+        if event["event"] == "result":
+            results[event["index"]] = event["recommendation"]
+        elif event["event"] == "trace":
+            trace = event["trace"]
+    return [results[index] for index in sorted(results)], trace
+
+async def stream_search(request, workflow, meal, coordinates, radius, deadline, language) -> web.StreamResponse:
+    """Writes every workflow event as one JSON line as soon as it happens.
+
+    If the client goes away the search is stopped, and the handler (and with it the admission slot)
+    is only released once the worker thread has actually let go of it.
+    """
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    stop = threading.Event()
+
+    def pump():
+        search_events = workflow.run_iter(meal, coordinates, radius=radius, deadline=deadline, language=language)
+        try:
+            for event in search_events:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(events.put_nowait, event)
+        except Exception as e:
+            loop.call_soon_threadsafe(events.put_nowait, {"event": "error", "error": str(e)})
+        finally:
+            search_events.close()  # cancels the places not started yet
+            loop.call_soon_threadsafe(events.put_nowait, None)
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    done = run_blocking(request, pump)
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            await response.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+        await response.write_eof()
+    finally:
+        stop.set()
+        await asyncio.shield(done)
+    return response
+
+async def suggestions(request: web.Request) -> web.Response:
+    # Served from the local catalog, so this never waits on the LLM and needs no admission slot.
+    catalog = get_suggestion_catalog()
+    language = request.query.get("language") or "English"
+    meal = request.query.get("meal")
+    if meal:
+        return web.json_response({"meal": meal, "variants": catalog.variants(meal, language)})
+    return web.json_response({"suggestions": catalog.general(language)})
+
+async def place_detail(request: web.Request) -> web.Response:
+    place_id = request.match_info["place_id"]
+    language = request.query.get("language") or "English"
+    try:
+        async with request.app["admission"].admit():
+            review_agent = get_workflow().review_agent
+            detail = await run_blocking(request, review_agent.analyze_reviews, place_id, language)
+    except Overloaded as e:
+        return overloaded_response(str(e))
+    return web.json_response({"place_id": place_id, **detail})
+
+async def health(request: web.Request) -> web.Response:
+    admission = request.app["admission"]
+    return web.json_response({"status": "ok", "active": admission.active, "queued": admission.waiting,
+                              **admission.stats})
+
+async def metrics(request: web.Request) -> web.Response:
+    """Prometheus text exposition: pipeline counters and span histograms plus admission state."""
+    admission = request.app["admission"]
+    lines = ["# TYPE mealfinder_searches_active gauge", f"mealfinder_searches_active {admission.active}",
+             "# TYPE mealfinder_searches_queued gauge", f"mealfinder_searches_queued {admission.waiting}"]
+    for name, value in admission.stats.items():
+        lines += [f"# TYPE mealfinder_admission_{name}_total counter", f"mealfinder_admission_{name}_total {value}"]
+    return web.Response(text=prometheus_text() + "\n".join(lines) + "\n",
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+def create_app() -> web.Application:
+    max_active = int(get_setting("service.max_active_searches", 8))
+    app = web.Application()
+    app["admission"] = AdmissionController(
+        max_active=max_active,
+        max_queued=int(get_setting("service.max_queued", 32)),
+        queue_timeout=float(get_setting("service.queue_timeout", 5)),
+    )
+    # Each admitted search holds one thread for its run_iter; per-place work uses the workflow's own pools.
+    app["executor"] = ThreadPoolExecutor(max_workers=max_active * 2, thread_name_prefix="search")
+
+    async def warm_up(app):
+        await asyncio.get_running_loop().run_in_executor(app["executor"], get_workflow)
+
+    async def shut_down(app):
+        app["executor"].shutdown(wait=False, cancel_futures=True)
+
+    app.on_startup.append(warm_up)
+    app.on_cleanup.append(shut_down)
+    app.add_routes([
+        web.get("/search", search),
+        web.post("/search", search),
+        web.get("/suggestions", suggestions),
+        web.get("/places/{place_id}", place_detail),
+        web.get("/health", health),
+        web.get("/metrics", metrics),
+    ])
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Meal Finder HTTP API")
+    parser.add_argument("--host", default=get_setting("service.host", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(get_setting("service.port", 8080)))
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -1,220 +1,284 @@
 import streamlit as st
-from workflow.meal_recommendation_workflow import MealRecommendationWorkflow
-from agents.meal_suggester_agent import MealSuggesterAgent
+from managers.resource_manager import get_workflow, get_suggestion_catalog, get_geocoder
 from streamlit_geolocation import streamlit_geolocation
-import requests
-import urllib.parse
-import pandas as pd
-import altair as alt
-import time
-import threading
 
-# -------------------- Page Configuration --------------------
-st.set_page_config(page_title="Smart Meal Finder AI", page_icon="🍔", layout="wide")
-st.title("🍽️ Smart Meal Finder AI")
+# -------------------- Shared resources --------------------
+# Built once per process and shared by every session; per-search settings are call parameters.
+@st.cache_resource
+def shared_workflow():
+    return get_workflow()
 
-# -------------------- Helper --------------------
-def geocode_location(location_name: str) -> str:
-    encoded_location = urllib.parse.quote(location_name)
-    url = f"https://nominatim.openstreetmap.org/search?q={encoded_location}&format=json&limit=1&addressdetails=1"
-    response = requests.get(url, headers={"User-Agent": "SmartMealFinder/1.0"})
-    if response.status_code == 200:
-        data = response.json()
-        if data:
-            lat = data[0]['lat']
-            lon = data[0]['lon']
-            return f"{lat},{lon}"
-    return ""
-
-def reverse_geocode(lat, lon):
-    url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json"
-    res = requests.get(url, headers={"User-Agent": "SmartMealFinder/1.0"})
-    if res.status_code == 200:
-        return res.json().get("display_name", "")
-    return ""
-
-# -------------------- Init agent and state --------------------
-if "suggester" not in st.session_state:
-    st.session_state.suggester = MealSuggesterAgent()
-
-if "suggestions" not in st.session_state:
-    st.session_state.suggestions = st.session_state.suggester.get_general_suggestions() or []
-
-if "refined" not in st.session_state:
-    st.session_state.refined = []
-
-if "clicked_category" not in st.session_state:
-    st.session_state.clicked_category = None
-
-if "meal" not in st.session_state:
-    st.session_state.meal = ""
-
-if "user_location" not in st.session_state:
-    st.session_state.user_location = ""
-
-if "results" not in st.session_state:
-    st.session_state.results = None
-
-# -------------------- Layout: Two Columns Full Width --------------------
-with st.container():
-    left_col, right_col = st.columns([1, 2], gap="large")
-
-    # --------------- Left Column: Search Inputs ---------------
-    with left_col:
-        st.markdown("### 🧠 Need ideas? Tap a suggestion!")
-        cols = st.columns(4)
-        for idx, (emoji, name) in enumerate(st.session_state.suggestions):
-            if cols[idx % 4].button(f"{emoji} {name}"):
-                st.session_state.clicked_category = name
-                st.session_state.meal = name
-                st.session_state.refined = st.session_state.suggester.get_sub_suggestions(name) or []
-
-        if st.session_state.refined:
-            st.markdown(f"#### 🔍 Variants of {st.session_state.clicked_category}")
-            variant_cols = st.columns(2)
-            for idx, variant in enumerate(st.session_state.refined):
-                if variant_cols[idx % 2].button(f"🍽️ {variant}"):
-                    st.session_state.meal = variant
-                    st.session_state.refined = []
-                    st.session_state.clicked_category = None
-
-        meal = st.text_input("🤔 What do you feel like eating?", value=st.session_state.meal,
-                             placeholder="e.g. chicken burger")
-        col1, col2 = st.columns(2)
-        with col1:
-            location = streamlit_geolocation()
-        with col2:
-            radius_km = st.number_input("Max distance (km)", min_value=0.0, step=0.5, value=0.0)
-
-        if location and location.get("latitude") and location.get("longitude"):
-            new_location_str = reverse_geocode(location["latitude"], location["longitude"])
-            if new_location_str and new_location_str != st.session_state.user_location:
-                st.session_state.user_location = new_location_str
-
-        location_name = st.text_input(
-            "📍 Your location",
-            value=st.session_state.user_location,
-            placeholder="e.g. Marszałkowska 1, Warsaw, Poland"
-        )
-
-        language = st.selectbox(
-            "🌐 In which language should we show the results?",
-            ["English", "Polish", "German", "French"]
-        )
-
-        col1, col2 = st.columns(2)
-        with col1:
-            min_rating = st.slider("Minimum rating", 0.0, 5.0, 0.0, step=0.1)
-        with col2:
-            sort_by = st.selectbox("Sort by", ["Rating", "Number of Reviews", "Name"])
-
-        if st.button("🍽️ Search"):
-            if not meal.strip() or not location_name.strip():
-                st.warning("Please fill in both fields.")
-            else:
-                placeholder = st.empty()
-                food_emojis = ["🍦", "🍤", "🍔", "🍕", "🥗", "🧋", "🌮", "🍟", "🥞"]
+@st.cache_resource
+def shared_suggestions():
+    return get_suggestion_catalog()
 
-                def perform_search():
-                    coordinates = geocode_location(location_name)
-                    if not coordinates:
-                        return None, "Couldn't find the location. Try something more specific."
-                    workflow = MealRecommendationWorkflow(language=language)
-                    radius_m = int(radius_km * 1000) if radius_km > 0 else None
-                    results = workflow.run(meal, coordinates, radius=radius_m)
-                    return results, None
-
-                search_result = [None]
-                error_result = [None]
-
-                def search_task():
-                    results, error = perform_search()
-                    search_result[0] = results
-                    error_result[0] = error
-
-                t = threading.Thread(target=search_task)
-                t.start()
-
-                i = 0
-                while t.is_alive():
-                    emoji = food_emojis[i % len(food_emojis)]
-                    placeholder.markdown(f"### {emoji} Getting hungry...")
-                    time.sleep(0.3)
-                    i += 1
-
-                t.join()
-                placeholder.empty()
-
-                if error_result[0]:
-                    st.error(error_result[0])
+@st.cache_resource
+def shared_geocoder():
+    return get_geocoder()
+
+# -------------------- Helper --------------------
+RESULTS_PAGE = 10
+LONG_TEXT_CHARS = 300
+
+def _number(value, cast):
+    try:
+        return cast(value or 0)
+    except (TypeError, ValueError):
+        return cast(0)
+
+def build_view(results: list) -> dict:
+    """Columns of the fields the result list filters, sorts and maps on, plus every sort order.
+
+    Built once per search, so moving the rating slider or changing the sort only re-slices indices.
+    """
+    ratings = [_number(r.get("rating"), float) for r in results]
+    reviews = [_number(r.get("user_ratings_total"), int) for r in results]
+    names = [r.get("name") or "" for r in results]
+    indices = range(len(results))
+    return {
+        "names": names,
+        "ratings": ratings,
+        "lat": [r.get("lat") for r in results],
+        "lng": [r.get("lng") for r in results],
+        "orders": {
+            "Rating": sorted(indices, key=lambda i: -ratings[i]),
+            "Number of Reviews": sorted(indices, key=lambda i: -reviews[i]),
+            "Name": sorted(indices, key=lambda i: names[i].lower()),
+        },
+    }
+
+def render_map(view: dict, indices: list):
+    """All visible results as markers on one map, instead of an embedded map per result."""
+    points = [{"name": view["names"][i], "rating": view["ratings"][i], "lat": view["lat"][i], "lng": view["lng"][i]}
+              for i in indices if view["lat"][i] is not None and view["lng"][i] is not None]
+    if not points:
+        return
+    import pydeck as pdk  # loaded once there is something to show
+
+    layer = pdk.Layer("ScatterplotLayer", data=points, get_position="[lng, lat]", get_radius=30,
+                      radius_min_pixels=6, get_fill_color=[230, 80, 40, 200], pickable=True)
+    center = pdk.ViewState(latitude=sum(p["lat"] for p in points) / len(points),
+                           longitude=sum(p["lng"] for p in points) / len(points), zoom=12)
+    st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=center, tooltip={"text": "{name}\n⭐ {rating}"}))
+
+def render_ratings_chart(ratings: list):
+    import altair as alt  # charting libraries are heavy; load them only when the chart is opened
+
+    chart = alt.Chart(alt.Data(values=[{"rating": rating} for rating in ratings])).mark_bar().encode(
+        x=alt.X('rating:O', title='Rating'),
+        y=alt.Y('count()', title='Count')
+    ).properties(title="Ratings Distribution")
+    st.altair_chart(chart, use_container_width=True)
+
+def render_long_text(label: str, text: str):
+    if len(text) <= LONG_TEXT_CHARS:
+        st.markdown(f"{label} {text}")
+        return
+    st.markdown(f"{label} {text[:LONG_TEXT_CHARS].rsplit(' ', 1)[0]}…")
+    with st.expander("Read more"):
+        st.markdown(text)
+
+def render_recommendation(r: dict):
+    st.markdown(f"### 🍴 {r.get('name', 'Unknown')}")
+    st.markdown(f"📍 **Address:** {r.get('address', 'N/A')}")
+    place_id = r.get("place_id")
+    if place_id:
+        maps_url = f"https://www.google.com/maps/place/?q=place_id:{place_id}"
+        st.markdown(f"[🗺️ View on Google Maps]({maps_url})", unsafe_allow_html=True)
+
+    st.markdown(f"⭐ **Rating:** {r.get('rating', 'N/A')} ({r.get('user_ratings_total', 0)} reviews)")
+
+    if r.get("price"):
+        st.markdown(f"💰 **Price Range:** {r['price']}")
+
+    if r.get("opening_hours"):
+        hours = r["opening_hours"].get("weekday_text", [])
+        if hours:
+            with st.expander("🕒 Opening Hours"):
+                for line in hours:
+                    st.markdown(f"- {line}")
+
+    render_long_text("🔍 **Match Summary:**", r.get("match_summary") or "N/A")
+    render_long_text("📝 **Review Summary:**", r.get("summary") or "N/A")
+
+    if r.get('menu_excerpt') and r['menu_excerpt'] != 'Menu not found':
+        with st.expander("📋 Menu Sample (scraped)"):
+            st.code(r['menu_excerpt'], language="text")
+
+def render_trace(trace: dict):
+    st.markdown(f"#### 🛠️ Last search: {trace['duration_ms'] / 1000:.2f}s")
+    stages = sorted(trace["stages"].items(), key=lambda item: -item[1]["total_ms"])
+    st.table([{"stage": name, "count": entry["count"], "total ms": round(entry["total_ms"], 1),
+               "max ms": round(entry["max_ms"], 1)} for name, entry in stages])
+    if trace["counters"]:
+        st.table([{"counter": key, "value": value} for key, value in sorted(trace["counters"].items())])
+    if trace["cache_hit_rates"]:
+        st.table([{"cache": name, "hit rate": f"{rate:.0%}"} for name, rate in sorted(trace["cache_hit_rates"].items())])
+    st.json(trace["spans"], expanded=False)
+
+# -------------------- Page --------------------
+def main():
+    """The page itself; Streamlit runs this file as __main__ on every rerun, importing it only defines helpers."""
+    # -------------------- Page Configuration --------------------
+    st.set_page_config(page_title="Smart Meal Finder AI", page_icon="🍔", layout="wide")
+    st.title("🍽️ Smart Meal Finder AI")
+
+    # -------------------- Init state --------------------
+    if "refined" not in st.session_state:
+        st.session_state.refined = []
+
+    if "clicked_category" not in st.session_state:
+        st.session_state.clicked_category = None
+
+    if "meal" not in st.session_state:
+        st.session_state.meal = ""
+
+    if "user_location" not in st.session_state:
+        st.session_state.user_location = ""
+
+    if "results" not in st.session_state:
+        st.session_state.results = None
+        st.session_state.view = None
+
+    if "shown" not in st.session_state:
+        st.session_state.shown = RESULTS_PAGE
+
+    # -------------------- Layout: Two Columns Full Width --------------------
+    with st.container():
+        left_col, right_col = st.columns([1, 2], gap="large")
+
+        # --------------- Left Column: Search Inputs ---------------
+        with left_col:
+            # Served from the local catalog; missing or stale entries are regenerated in the background.
+            suggestions = shared_suggestions()
+            suggestion_language = st.session_state.get("language", "English")
+            st.markdown("### 🧠 Need ideas? Tap a suggestion!")
+            cols = st.columns(4)
+            for idx, (emoji, name) in enumerate(suggestions.general(suggestion_language)):
+                if cols[idx % 4].button(f"{emoji} {name}"):
+                    st.session_state.clicked_category = name
+                    st.session_state.meal = name
+                    st.session_state.refined = suggestions.variants(name, suggestion_language)
+                    st.rerun()
+
+            if st.session_state.refined:
+                st.markdown(f"#### 🔍 Variants of {st.session_state.clicked_category}")
+                variant_cols = st.columns(2)
+                for idx, variant in enumerate(st.session_state.refined):
+                    if variant_cols[idx % 2].button(f"🍽️ {variant}"):
+                        st.session_state.meal = variant
+                        st.session_state.refined = []
+                        st.session_state.clicked_category = None
+                        st.rerun()
+
+            meal = st.text_input("🤔 What do you feel like eating?", value=st.session_state.meal,
+                                 placeholder="e.g. chicken burger")
+            col1, col2 = st.columns(2)
+            with col1:
+                location = streamlit_geolocation()
+            with col2:
+                radius_km = st.number_input("Max distance (km)", min_value=0.0, step=0.5, value=0.0)
+
+            if location and location.get("latitude") and location.get("longitude"):
+                coords = (location["latitude"], location["longitude"])
+                # Only look the position up again when the browser reports a new one.
+                if coords != st.session_state.get("geolocated_coords"):
+                    st.session_state.geolocated_coords = coords
+                    new_location_str = shared_geocoder().reverse_geocode(*coords)
+                    if new_location_str and new_location_str != st.session_state.user_location:
+                        st.session_state.user_location = new_location_str
+
+            location_name = st.text_input(
+                "📍 Your location",
+                value=st.session_state.user_location,
+                placeholder="e.g. Marszałkowska 1, Warsaw, Poland"
+            )
+
+            language = st.selectbox(
+                "🌐 In which language should we show the results?",
+                ["English", "Polish", "German", "French"],
+                key="language"
+            )
+
+            col1, col2 = st.columns(2)
+            with col1:
+                min_rating = st.slider("Minimum rating", 0.0, 5.0, 0.0, step=0.1)
+            with col2:
+                sort_by = st.selectbox("Sort by", ["Rating", "Number of Reviews", "Name"])
+
+            show_debug = st.checkbox("🛠️ Debug panel", help="Stage timings, upstream calls, LLM tokens and cache hit rates")
+
+            if st.button("🍽️ Search"):
+                if not meal.strip() or not location_name.strip():
+                    st.warning("Please fill in both fields.")
                 else:
-                    st.session_state.results = search_result[0] if search_result[0] else []
-
-    # --------------- Right Column: Display Results or Welcome Message ---------------
-    with right_col:
-        if st.session_state.results is None:
-            st.markdown("## 👋 Welcome to Smart Meal Finder AI!")
-            st.markdown("""
-            ### Use the search panel on the left to find amazing restaurants and meals near you.
-            """)
-        else:
-            filtered = [
-                r for r in st.session_state.results
-                if r.get("rating") and float(r.get("rating", 0)) >= min_rating
-            ]
-
-            if sort_by == "Rating":
-                filtered.sort(key=lambda x: float(x.get("rating", 0)), reverse=True)
-            elif sort_by == "Number of Reviews":
-                filtered.sort(key=lambda x: int(x.get("user_ratings_total", 0)), reverse=True)
-            elif sort_by == "Name":
-                filtered.sort(key=lambda x: x.get("name", "").lower())
-
-            if filtered:
-                st.markdown(f"## 🔍 Found {len(filtered)} recommendations")
-
-                for r in filtered:
-                    st.markdown(f"### 🍴 {r.get('name', 'Unknown')}")
-                    st.markdown(f"📍 **Address:** {r.get('address', 'N/A')}")
-                    place_id = r.get("place_id")
-                    if place_id:
-                        maps_url = f"https://www.google.com/maps/place/?q=place_id:{place_id}"
-                        st.markdown(f"[🗺️ View on Google Maps]({maps_url})", unsafe_allow_html=True)
-
-                    lat = r.get("lat")
-                    lng = r.get("lng")
-                    if lat and lng:
-                        iframe_url = f"https://maps.google.com/maps?q={lat},{lng}&z=15&output=embed"
-                        st.markdown(
-                            f'<iframe src="{iframe_url}" width="100%" height="300" style="border:0;" allowfullscreen="" loading="lazy"></iframe>',
-                            unsafe_allow_html=True
-                        )
-
-                    st.markdown(f"⭐ **Rating:** {r.get('rating', 'N/A')} ({r.get('user_ratings_total', 0)} reviews)")
-
-                    if r.get("price"):
-                        st.markdown(f"💰 **Price Range:** {r['price']}")
-
-                    if r.get("opening_hours"):
-                        hours = r["opening_hours"].get("weekday_text", [])
-                        if hours:
-                            with st.expander("🕒 Opening Hours"):
-                                for line in hours:
-                                    st.markdown(f"- {line}")
-
-                    st.markdown(f"🔍 **Match Summary:** {r.get('match_summary', 'N/A')}")
-                    st.markdown(f"📝 **Review Summary:** {r.get('summary', 'N/A')}")
-
-                    if r.get('menu_excerpt') and r['menu_excerpt'] != 'Menu not found':
-                        with st.expander("📋 Menu Sample (scraped)"):
-                            st.code(r['menu_excerpt'], language="text")
-
-                df = pd.DataFrame(filtered)
-                if not df.empty:
-                    chart = alt.Chart(df).mark_bar().encode(
-                        x=alt.X('rating:O', title='Rating'),
-                        y=alt.Y('count()', title='Count')
-                    ).properties(title="Ratings Distribution")
-                    st.altair_chart(chart, use_container_width=True)
+                    coordinates = shared_geocoder().geocode(location_name)
+                    if not coordinates:
+                        st.error("Couldn't find the location. Try something more specific.")
+                    else:
+                        status = st.empty()
+                        live = right_col.empty()
+                        # Created once; each finished card is appended, earlier ones are never redrawn.
+                        live_cards = live.container()
+                        live_header = live_cards.empty()
+                        food_emojis = ["🍦", "🍤", "🍔", "🍕", "🥗", "🧋", "🌮", "🍟", "🥞"]
+                        status.markdown(f"### {food_emojis[0]} Getting hungry...")
+
+                        workflow = shared_workflow()
+                        radius_m = int(radius_km * 1000) if radius_km > 0 else None
+                        results = []
+                        checked = 0
+                        for event in workflow.run_iter(meal, coordinates, radius=radius_m, language=language):
+                            emoji = food_emojis[checked % len(food_emojis)]
+                            if event["event"] == "places_found":
+                                status.markdown(f"### {emoji} Found {event['count']} places, checking menus...")
+                            elif event["event"] in ("match_done", "reviews_done"):
+                                checked += 1
+                                status.markdown(f"### {emoji} Checking {event['name']}...")
+                            elif event["event"] == "result":
+                                results.append(event["recommendation"])
+                                live_header.markdown(f"## ⏳ {len(results)} recommendations so far...")
+                                with live_cards:
+                                    render_recommendation(event["recommendation"])
+                            elif event["event"] == "trace":
+                                st.session_state.trace = event["trace"]
+
+                        status.empty()
+                        live.empty()
+                        st.session_state.results = results
+                        st.session_state.view = build_view(results)
+                        st.session_state.shown = RESULTS_PAGE
+
+        # --------------- Right Column: Display Results or Welcome Message ---------------
+        with right_col:
+            if st.session_state.results is None:
+                st.markdown("## 👋 Welcome to Smart Meal Finder AI!")
+                st.markdown("""
+                ### Use the search panel on the left to find amazing restaurants and meals near you.
+                """)
             else:
-                st.warning("No recommendations found. Try a different meal or location.")
\ No newline at end of file
+                results, view = st.session_state.results, st.session_state.view
+                visible = [i for i in view["orders"][sort_by] if view["ratings"][i] and view["ratings"][i] >= min_rating]
+
+                if visible:
+                    st.markdown(f"## 🔍 Found {len(visible)} recommendations")
+                    render_map(view, visible)
+
+                    for i in visible[:st.session_state.shown]:
+                        render_recommendation(results[i])
+                    if len(visible) > st.session_state.shown:
+                        if st.button(f"⬇️ Show more ({len(visible) - st.session_state.shown} left)"):
+                            st.session_state.shown += RESULTS_PAGE
+                            st.rerun()
+
+                    if st.checkbox("📊 Show ratings distribution"):
+                        render_ratings_chart([view["ratings"][i] for i in visible])
+                else:
+                    st.warning("No recommendations found. Try a different meal or location.")
+
+            if show_debug and st.session_state.get("trace"):
+                with st.expander("🛠️ Debug", expanded=True):
+                    render_trace(st.session_state.trace)
+
+if __name__ == "__main__":
+    main()
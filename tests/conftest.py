@@ -0,0 +1,26 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Persistent caches and vector stores go to a throwaway directory instead of the project's .cache.
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="mealfinder-tests-")
+
+def _run_threads(*targets, stagger: float = 0.01):
+    """Starts each target in its own thread, `stagger` seconds apart, and waits for all of them."""
+    threads = []
+    for target in targets:
+        thread = threading.Thread(target=target)
+        thread.start()
+        threads.append(thread)
+        time.sleep(stagger)
+    for thread in threads:
+        thread.join(5)
+
+@pytest.fixture
+def run_threads():
+    return _run_threads
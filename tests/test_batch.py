@@ -0,0 +1,37 @@
+import pytest
+
+from batch import completed_ids, drop_torn_line, read_queries, run_query
+
+@pytest.mark.parametrize("content, expected", [
+    (b"", b""),
+    (b'{"id": "1"}\n', b'{"id": "1"}\n'),
+    (b'{"id": "1"}\n{"id": "2", "res', b'{"id": "1"}\n'),
+    (b'{"id": "1", "res', b""),
+])
+def test_drop_torn_line(tmp_path, content, expected):
+    path = tmp_path / "results.jsonl"
+    path.write_bytes(content)
+    drop_torn_line(str(path), block_size=4)
+    assert path.read_bytes() == expected
+
+def test_completed_ids_skips_failures_only_when_retrying(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text('{"id": "1", "status": "ok"}\n{"id": "2", "status": "error"}\nnot json\n', encoding="utf-8")
+    assert completed_ids(str(path)) == {"1", "2"}
+    assert completed_ids(str(path), retry_failed=True) == {"1"}
+    assert completed_ids(str(tmp_path / "missing.jsonl")) == set()
+
+def test_malformed_lines_fail_alone(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    path.write_text('{"id": "a", "meal": "pizza", "location": "Kraków"}\n'
+                    '{"meal": "sushi", "loc\n'
+                    '\n'
+                    '["not", "an", "object"]\n'
+                    '{"meal": "ramen", "location": "Gdańsk"}\n', encoding="utf-8")
+    queries = list(read_queries(str(path)))
+    assert [query_id for query_id, _ in queries] == ["a", "2", "3", "4"]
+    assert queries[3][1]["meal"] == "ramen"
+
+    record = run_query(*queries[1])
+    assert record["id"] == "2" and record["status"] == "error" and "invalid JSON" in record["error"]
+    assert run_query(*queries[2])["status"] == "error"
@@ -0,0 +1,55 @@
+import uuid
+
+from managers.cache_manager import TTLCache
+from managers.tracing import start_trace
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache("test", max_entries=2, persist=False)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats["evictions"] == 1
+
+def test_ttl_cache_expires_entries_and_returns_copies():
+    cache = TTLCache("test", persist=False)
+    cache.set("gone", "x", ttl=-1)
+    assert cache.get("gone", "default") == "default"
+    assert cache.stats["expirations"] == 1
+
+    cache.set("list", [1, 2])
+    cache.get("list").append(3)
+    assert cache.get("list") == [1, 2]
+
+def disk_keys(cache):
+    return {key for key, in cache._db.execute("SELECT key FROM entries")}
+
+def test_disk_table_keeps_only_the_newest_max_entries():
+    cache = TTLCache(f"test_{uuid.uuid4().hex}", max_entries=3)
+    cache.SWEEP_EVERY = 1
+    for i in range(6):
+        cache.set(f"k{i}", i)
+    cache.set("k0", "rewritten")  # a rewrite counts as a new write
+    assert disk_keys(cache) == {"k4", "k5", "k0"}
+    assert cache.stats["disk_evictions"] == 4
+
+def test_sweep_drops_expired_rows_and_reopening_sees_the_bounded_table():
+    name = f"test_{uuid.uuid4().hex}"
+    cache = TTLCache(name, max_entries=10)
+    cache.SWEEP_EVERY = 2
+    cache.set("old", 1, ttl=-1)
+    cache.set("fresh", 2)
+    assert disk_keys(cache) == {"fresh"}
+
+    reopened = TTLCache(name, max_entries=10)
+    assert reopened.get("fresh") == 2
+    assert reopened.stats["disk_hits"] == 1
+
+def test_evictions_are_reported_as_counters():
+    cache = TTLCache("counted", max_entries=1, persist=False)
+    trace = start_trace("search")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert trace.counters["cache_evictions:counted"] == 1
@@ -0,0 +1,39 @@
+import pytest
+
+from tools.candidate_ranking import CandidateScorer, top_k
+
+ORIGIN = "50.0614,19.9366"
+
+def place(place_id, rating=4.5, reviews=100, lat=50.0614, lng=19.9366, name="Bistro", types=("restaurant",)):
+    return {"place_id": place_id, "name": name, "types": list(types), "rating": rating,
+            "user_ratings_total": reviews, "geometry": {"location": {"lat": lat, "lng": lng}}}
+
+@pytest.fixture
+def scorer():
+    return CandidateScorer("burger", ORIGIN, radius=2000)
+
+def test_few_perfect_ratings_do_not_beat_many_good_ones(scorer):
+    assert scorer.score(place("many", rating=4.7, reviews=2000)) > scorer.score(place("few", rating=5.0, reviews=3))
+
+def test_closer_places_score_higher(scorer):
+    near, far = place("near"), place("far", lat=50.0734)  # ~1.3 km north
+    assert scorer.score(near) > scorer.score(far)
+    assert scorer.score(place("outside", lat=50.2)) == pytest.approx(scorer.score(place("edge", lat=50.09)))
+
+def test_meal_words_in_name_or_types_count(scorer):
+    plain = scorer.score(place("plain"))
+    assert scorer.score(place("name", name="Burger Bar")) > plain
+    assert scorer.score(place("compound", name="Cheeseburger Heaven")) > plain
+    assert scorer.score(place("type", types=("hamburger_restaurant",))) > plain
+
+def test_missing_coordinates_get_a_neutral_distance(scorer):
+    assert scorer._distance_score({"name": "No geometry"}) == 0.5
+
+def test_top_k_keeps_the_best_in_order(scorer):
+    places = (place(f"p{i}", rating=rating) for i, rating in enumerate([3.0, 4.9, 4.0, 4.9, 2.0, 4.5]))
+    best = top_k(places, scorer, 3)
+    assert [p["place_id"] for p in best] == ["p1", "p3", "p5"]  # the tie keeps Google's order
+
+def test_top_k_skips_duplicates(scorer):
+    best = top_k([place("a"), place("a", rating=5.0), place("b", rating=3.0)], scorer, 5)
+    assert [p["place_id"] for p in best] == ["a", "b"]
@@ -0,0 +1,128 @@
+import time
+import threading
+
+import pytest
+
+from managers.concurrency_manager import SingleFlight, _ran_out_of_time
+from managers.tracing import prometheus_text, start_trace
+from tools.http_transport import DeadlineExceeded, set_deadline, with_current_context
+
+def test_single_flight_collapses_concurrent_calls(run_threads):
+    flight = SingleFlight("test")
+    calls, results = [], []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 1}
+
+    run_threads(*[lambda: results.append(flight.do("key", work)) for _ in range(4)])
+    assert len(calls) == 1
+    assert results == [{"value": 1}] * 4
+    assert results[0] is not results[1]  # waiters get their own copy
+    assert flight.stats["leaders"] == 1 and flight.stats["collapsed"] == 3
+
+def test_single_flight_leader_may_mutate_its_result(run_threads):
+    flight = SingleFlight("test")
+    results = {}
+
+    def work():
+        time.sleep(0.1)
+        return {"items": [1]}
+
+    def leader():
+        results["leader"] = result = flight.do("key", work)
+        result["items"].append("leader's own")
+
+    run_threads(leader, lambda: results.setdefault("waiter", flight.do("key", work)))
+    assert results["waiter"] == {"items": [1]}
+
+def test_single_flight_shares_the_leaders_error(run_threads):
+    flight = SingleFlight("test")
+    errors = []
+
+    def work():
+        time.sleep(0.1)
+        raise ValueError("upstream said no")
+
+    def call():
+        try:
+            flight.do("key", work)
+        except ValueError as e:
+            errors.append(e)
+
+    run_threads(call, call, call)
+    assert len(errors) == 3 and len({id(e) for e in errors}) == 1
+    assert flight.stats["errors"] == 1
+    assert not flight._calls  # nothing left in flight after a failure
+
+def test_single_flight_waiter_retries_when_the_leader_ran_out_of_time(run_threads):
+    flight = SingleFlight("test")
+    leaders, outcome = [], {}
+
+    def work(budget):
+        leaders.append(budget)
+        time.sleep(0.1)
+        if budget < 1:
+            raise DeadlineExceeded("leader's own deadline")
+        return budget
+
+    def call(name, budget):
+        def run():
+            set_deadline(time.monotonic() + budget)
+            try:
+                outcome[name] = flight.do("key", work, budget)
+            except DeadlineExceeded as e:
+                outcome[name] = e
+        return run
+
+    run_threads(call("short", 0.5), call("long", 30))
+    assert isinstance(outcome["short"], DeadlineExceeded)
+    assert outcome["long"] == 30
+    assert leaders == [0.5, 30]
+    assert flight.stats["retries"] == 1 and flight.stats["collapsed"] == 0
+
+def test_client_timeouts_count_as_running_out_of_time():
+    httpx = pytest.importorskip("httpx")
+    openai = pytest.importorskip("openai")
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    assert _ran_out_of_time(openai.APITimeoutError(request=request))
+    assert _ran_out_of_time(httpx.ReadTimeout("read timed out"))
+    assert not _ran_out_of_time(ValueError("bad answer"))
+
+def test_single_flight_counts_reach_the_trace_and_metrics(run_threads):
+    flight = SingleFlight("traced")
+    trace = start_trace("search")
+
+    def work():
+        time.sleep(0.1)
+        return 1
+
+    run_threads(*[with_current_context(lambda: flight.do("key", work)) for _ in range(3)])
+    assert trace.counters["single_flight_leaders:traced"] == 1
+    assert trace.counters["single_flight_collapsed:traced"] == 2
+    assert 'mealfinder_single_flight_collapsed_total{group="traced"} 2' in prometheus_text()
+
+def test_single_flight_waiter_stops_at_its_own_deadline():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    outcome = {}
+
+    def slow():
+        release.wait(5)
+        return "late"
+
+    def waiter():
+        set_deadline(time.monotonic() + 0.05)
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            flight.do("key", slow)
+        outcome["waited"] = time.monotonic() - started
+
+    leader = threading.Thread(target=lambda: flight.do("key", slow))
+    leader.start()
+    time.sleep(0.01)
+    waiter()
+    release.set()
+    leader.join(5)
+    assert outcome["waited"] < 1
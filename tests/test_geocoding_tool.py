@@ -0,0 +1,42 @@
+import time
+
+import pytest
+
+import tools.geocoding_tool as geocoding
+from managers.cache_manager import TTLCache
+from managers.concurrency_manager import TokenBucket
+from tools.http_transport import set_deadline
+
+def test_token_bucket_gives_up_when_the_wait_exceeds_the_timeout():
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.05)
+    assert TokenBucket(rate=100, capacity=1).acquire(timeout=0.05)
+
+@pytest.fixture
+def tool(monkeypatch):
+    monkeypatch.setattr(geocoding, "_nominatim_bucket", TokenBucket(rate=0.01, capacity=1))
+    return geocoding.GeocodingTool(cache=TTLCache("geocoding_test", persist=False))
+
+def test_cached_lookups_skip_the_rate_limit(tool):
+    tool.cache.set("forward:kraków", [{"lat": "50.06", "lon": "19.94"}])
+    assert geocoding._nominatim_bucket.acquire()  # empty the bucket
+    set_deadline(time.monotonic() + 1)  # a miss would fail fast instead of waiting 100 s
+    try:
+        assert tool.geocode(" Kraków ") == "50.06,19.94"
+    finally:
+        set_deadline(None)
+
+def test_rate_limit_wait_stops_at_the_search_deadline(tool, monkeypatch):
+    requests_sent = []
+    monkeypatch.setattr(geocoding, "http_get", lambda url, backend, before_attempt=None, **kwargs:
+                        before_attempt() or requests_sent.append(url))
+    assert geocoding._nominatim_bucket.acquire()  # the next token is 100 s away
+    set_deadline(time.monotonic() + 0.1)
+    try:
+        started = time.monotonic()
+        assert tool.geocode("Gdańsk") == ""
+    finally:
+        set_deadline(None)
+    assert time.monotonic() - started < 1
+    assert requests_sent == []
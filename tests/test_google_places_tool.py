@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+import tools.google_places_tool as places_module
+from managers.cache_manager import TTLCache
+from tools.google_places_tool import GooglePlacesTool
+from tools.http_transport import set_deadline
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self):
+        return self._data
+
+@pytest.fixture
+def google(monkeypatch):
+    """Records the params of every Places request; answers are queued per endpoint."""
+    calls, answers = [], {"textsearch": [], "details": []}
+
+    def http_get(url, backend, params=None, **kwargs):
+        endpoint = url.rsplit("/", 2)[-2]
+        calls.append((endpoint, params))
+        return FakeResponse(answers[endpoint].pop(0))
+
+    monkeypatch.setattr(places_module, "http_get", http_get)
+    google.calls, google.answers = calls, answers
+    return google
+
+@pytest.fixture
+def tool():
+    tool = GooglePlacesTool(api_key="test", cache=TTLCache("places_test", persist=False))
+    tool.page_delay = 0
+    return tool
+
+def page(*names, token=None, status="OK"):
+    data = {"status": status, "results": [{"place_id": name, "name": name} for name in names]}
+    if token:
+        data["next_page_token"] = token
+    return data
+
+def test_same_query_in_the_same_cell_is_searched_once(google, tool):
+    google.answers["textsearch"].append(page("a", "b"))
+    first = tool.search_places("Pizza  Margherita", "50.06143,19.93658", radius=1000)
+    second = tool.search_places("pizza margherita", "50.06150,19.93660", radius=1000)
+    assert first == second and len(google.calls) == 1
+
+def test_radius_and_cell_are_part_of_the_key(google, tool):
+    google.answers["textsearch"] += [page("a"), page("b"), page("c")]
+    tool.search_places("pizza", "50.06143,19.93658", radius=1000)
+    tool.search_places("pizza", "50.06143,19.93658", radius=2000)
+    tool.search_places("pizza", "52.22977,21.01178", radius=1000)
+    assert len(google.calls) == 3
+
+def test_only_definite_answers_are_cached(google, tool):
+    google.answers["textsearch"] += [page(status="ZERO_RESULTS"), page(status="OVER_QUERY_LIMIT"), page("a")]
+    assert tool.search_places("durian", "50.06,19.93") == []
+    assert tool.search_places("durian", "50.06,19.93") == []  # ZERO_RESULTS came from the cache
+    assert tool.search_places("ramen", "50.06,19.93") == []
+    assert [place["name"] for place in tool.search_places("ramen", "50.06,19.93")] == ["a"]
+    assert len(google.calls) == 3
+
+def test_place_details_are_cached(google, tool):
+    google.answers["details"].append({"status": "OK", "result": {"reviews": [{"text": "Great"}]}})
+    assert tool.get_place_details("a")["reviews"] == [{"text": "Great"}]
+    assert tool.get_place_details("a")["reviews"] == [{"text": "Great"}]
+    assert len(google.calls) == 1
+
+def test_next_page_is_requested_only_when_more_places_are_wanted(google, tool):
+    google.answers["textsearch"] += [page("a", "b", token="t1"), page("c", "d", token="t2")]
+    names = [p["name"] for p in tool.search_places_iter("pizza", "50.06,19.93", max_results=3)]
+    assert names == ["a", "b", "c"]
+    assert [params.get("pagetoken") for _, params in google.calls] == [None, "t1"]
+
+def test_cached_follow_up_pages_skip_the_page_delay(google, tool):
+    tool.page_delay = 0.3
+    google.answers["textsearch"] += [page("a", token="t1"), page("b")]
+    started = time.monotonic()
+    assert len(list(tool.search_places_iter("pizza", "50.06,19.93"))) == 2
+    assert time.monotonic() - started >= 0.3
+    started = time.monotonic()
+    assert len(list(tool.search_places_iter("pizza", "50.06,19.93"))) == 2
+    assert time.monotonic() - started < 0.1 and len(google.calls) == 2
+
+def test_no_next_page_when_the_deadline_is_too_close(google, tool):
+    tool.page_delay = 2
+    google.answers["textsearch"].append(page("a", token="t1"))
+    set_deadline(time.monotonic() + 1)
+    try:
+        assert [p["name"] for p in tool.search_places_iter("pizza", "50.06,19.93")] == ["a"]
+    finally:
+        set_deadline(None)
+    assert len(google.calls) == 1
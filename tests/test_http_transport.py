@@ -0,0 +1,23 @@
+import time
+
+import pytest
+
+from tools.http_transport import DeadlineExceeded, HttpTransport, check_deadline, set_deadline
+
+def test_one_session_with_a_bounded_set_of_host_pools():
+    transport = HttpTransport()
+    adapter = transport.session.get_adapter("https://a.example")
+    assert transport.session.get_adapter("http://b.example") is adapter
+    for i in range(100):  # a pool per restaurant site, created without connecting
+        adapter.poolmanager.connection_from_host(f"site{i}.example", 443, "https")
+    assert len(adapter.poolmanager.pools) == 32
+
+def test_requests_stop_at_the_deadline():
+    set_deadline(time.monotonic() - 1)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            check_deadline()
+        with pytest.raises(DeadlineExceeded):
+            HttpTransport().get("http://127.0.0.1:9/", "websites")
+    finally:
+        set_deadline(None)
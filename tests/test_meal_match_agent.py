@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from agents.meal_match_agent import NO_MENU_MATCH, MealMatchAgent
+
+class FakeLLM:
+    """Answers with queued contents and keeps every message list it was sent."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def invoke(self, messages):
+        self.calls.append(messages)
+        answer = self.answers.pop(0)
+        return type("Response", (), {"content": answer(messages) if callable(answer) else answer})()
+
+class FakeIndex:
+    def similarities(self, query, place_ids, kinds=None):
+        return {place_id: 0.0 for place_id in place_ids}
+
+    def add_document(self, place_id, kind, text):
+        pass
+
+    def get_document(self, place_id, kind):
+        return None
+
+PLACES = [{"place_id": name, "name": name, "types": ["restaurant"], "website": f"https://{name}.example"}
+          for name in ("alpha", "beta", "gamma")]
+
+def make_agent(llm, menus=None):
+    agent = MealMatchAgent(places_tool=object(), llm=llm, vector_index=FakeIndex())
+    agent.menu_fetcher.fetch = lambda url: (menus or {}).get(url.split("//")[1].split(".")[0], "")
+    return agent
+
+def verdicts(*entries):
+    return json.dumps([{"index": i, "match": match, "summary": summary} for i, match, summary in entries])
+
+def test_batch_keeps_only_well_formed_verdicts():
+    answer = json.dumps([
+        {"index": 0, "match": True, "summary": " Serves pizza. "},
+        {"index": 0, "match": False, "summary": "duplicate, ignored"},
+        {"index": 1, "match": "yes", "summary": "match is not a bool"},
+        {"index": 2, "match": False, "summary": "   "},
+        {"index": 7, "match": True, "summary": "no such candidate"},
+        "not an object",
+    ])
+    agent = make_agent(FakeLLM(answer))
+    assert agent._summarize_matches_batch("pizza", PLACES, ["", "", ""]) == ["Serves pizza.", None, None]
+
+@pytest.mark.parametrize("answer", ["Sorry, I cannot help.", '{"index": 0}'])
+def test_batch_that_is_not_a_json_list_yields_nothing(answer):
+    agent = make_agent(FakeLLM(answer))
+    assert agent._summarize_matches_batch("pizza", PLACES, ["", "", ""]) == [None, None, None]
+
+def test_malformed_entries_fall_back_to_one_call_per_place():
+    llm = FakeLLM(verdicts((0, True, "Alpha has it."), (2, False, "Gamma does not.")), "Beta, asked alone.")
+    results = make_agent(llm).match_places("pizza", PLACES)
+    assert [result["match_summary"] for result in results] == ["Alpha has it.", "Beta, asked alone.", "Gamma does not."]
+    assert len(llm.calls) == 2
+    assert "beta" in llm.calls[1][1].content and "alpha" not in llm.calls[1][1].content
+
+def test_places_settled_without_the_llm_are_reported_early():
+    menus = {"alpha": "Margherita pizza, calzone", "beta": "Only soups and salads here", "gamma": ""}
+    ready = []
+
+    def batch(messages):
+        assert ready == [1]  # beta was released before the batch call started
+        content = messages[1].content
+        candidates = json.loads(content[content.index("[{"):content.rindex("}]") + 2])
+        assert [candidate["name"] for candidate in candidates] == ["alpha", "gamma"]
+        return verdicts((0, True, "Alpha has it."), (1, False, "Gamma does not."))
+
+    agent = make_agent(FakeLLM(batch), menus)
+    agent.skip_llm_without_match = True
+    results = agent.match_places("pizza", PLACES, on_ready=lambda i, recommendation: ready.append(i))
+    assert [result["match_summary"] for result in results] == ["Alpha has it.", NO_MENU_MATCH, "Gamma does not."]
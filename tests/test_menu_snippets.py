@@ -0,0 +1,61 @@
+import pytest
+
+from agents.meal_match_agent import MealMatchAgent
+from tools.menu_snippets import MenuSnippetExtractor, mentions, tokenize
+
+MENU = ("Starters: tomato soup, chickpea salad. Mains: Hamburger 25 zł, Cheeseburger 28 zł, "
+        "grilled salmon with potatoes. Desserts: apple pie, pastry of the day.")
+
+@pytest.mark.parametrize("a, b", [
+    ("pizza", "pizzy"), ("burger", "burgers"), ("burger", "burgery"), ("pierogi", "pierogów"), ("dish", "dishes"),
+])
+def test_inflected_forms_share_a_stem(a, b):
+    assert tokenize(a) == tokenize(b)
+
+@pytest.mark.parametrize("a, b", [
+    ("chicken", "chickpea"), ("salad", "salami"), ("pasta", "pastry"),
+])
+def test_unrelated_words_do_not_collide(a, b):
+    assert not mentions(a, b) and not mentions(b, a)
+
+def test_compounds_match_their_last_word():
+    assert mentions("burger", "Hamburger, Cheeseburger")
+    assert mentions("wurst", "Currywurst")
+    assert not mentions("ham", "graham crackers")  # short words only match whole
+
+def test_place_types_are_split_on_underscores():
+    assert "sush" in tokenize("sushi_restaurant")
+
+def test_extractor_finds_compound_menu_items():
+    snippet, score = MenuSnippetExtractor().extract("burger", MENU)
+    assert "Cheeseburger" in snippet and score > 0
+
+def test_extractor_returns_nothing_without_a_mention():
+    assert MenuSnippetExtractor().extract("ramen", MENU) == ("", 0.0)
+
+class FakeIndex:
+    """Every indexed menu is far from every query, so only BM25 and the place decide."""
+
+    def similarities(self, query, place_ids, kinds=None):
+        return {place_id: 0.0 for place_id in place_ids}
+
+@pytest.fixture
+def agent():
+    agent = MealMatchAgent(places_tool=object(), llm=object(), vector_index=FakeIndex())
+    agent.skip_llm_without_match = True
+    return agent
+
+def test_skip_gate_needs_a_scraped_menu_without_a_snippet(agent):
+    place = {"place_id": "bistro", "name": "Bistro", "types": ["restaurant"]}
+    assert agent._can_skip_llm("ramen", place, MENU, "")
+    assert not agent._can_skip_llm("ramen", place, "", "")  # nothing scraped, the LLM decides
+    assert not agent._can_skip_llm("burger", place, MENU, "Hamburger 25 zł")
+
+def test_skip_gate_respects_name_and_types(agent):
+    homepage = "Please enable JavaScript to view this site."
+    assert not agent._can_skip_llm("sushi", {"place_id": "a", "name": "Sushi Master", "types": []}, homepage, "")
+    assert not agent._can_skip_llm("sushi", {"place_id": "b", "name": "Kaito", "types": ["sushi_restaurant"]}, homepage, "")
+
+def test_skip_gate_is_off_by_default():
+    agent = MealMatchAgent(places_tool=object(), llm=object(), vector_index=FakeIndex())
+    assert not agent._can_skip_llm("ramen", {"place_id": "bistro", "name": "Bistro"}, MENU, "")
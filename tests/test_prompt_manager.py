@@ -0,0 +1,69 @@
+import os
+import time
+
+import pytest
+
+import managers.prompt_manager as prompt_manager
+from managers.prompt_manager import PromptManager, PromptTemplate
+
+MATCHER = "system: Match food.\ntemplate: Does {name} ({types}) serve {query}?\nlanguage: Answer in {language}.\n"
+
+def test_shipped_prompts_all_load():
+    manager = PromptManager()
+    for name in prompt_manager.EXPECTED_PLACEHOLDERS:
+        assert manager.get(name).template
+
+def test_placeholders_must_match_what_the_agents_pass():
+    with pytest.raises(ValueError, match="expected"):
+        PromptTemplate("matcher.yaml", {"system": "s", "template": "Does {name} serve {dish}?"})
+    with pytest.raises(ValueError, match="language"):
+        PromptTemplate("review.yaml", {"system": "s", "template": "{reviews}", "language": "Use {lang}."})
+    with pytest.raises(ValueError, match="system"):
+        PromptTemplate("review.yaml", {"template": "{reviews}"})
+
+def test_format_and_language_instruction():
+    prompt = PromptTemplate("matcher.yaml", {"system": "Match food.", "template": "Does {name} ({types}) serve {query}?",
+                                             "language": "Answer in {language}."})
+    with pytest.raises(KeyError):
+        prompt.format(query="pizza", name="Roma")
+    assert prompt.format(query="pizza", name="Roma", types="restaurant") == "Does Roma (restaurant) serve pizza?"
+    assert prompt.system_for("English") == "Match food."
+    assert prompt.system_for("Polish") == "Match food.\nAnswer in Polish."
+
+def write(path, text, mtime):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+@pytest.fixture
+def fast_reload(monkeypatch):
+    settings = prompt_manager.get_setting
+    monkeypatch.setattr(prompt_manager, "get_setting",
+                        lambda path, default=None: 0.05 if path == "prompts.reload_interval" else settings(path, default))
+
+def test_edits_are_reloaded_and_broken_edits_are_ignored(tmp_path, fast_reload):
+    path = tmp_path / "matcher.yaml"
+    write(path, MATCHER, 1_000_000)
+    manager = PromptManager(str(tmp_path))
+    assert manager.get("matcher.yaml").system == "Match food."
+
+    write(path, MATCHER.replace("Match food.", "Match dishes."), 1_000_010)
+    assert wait_for(lambda: manager.get("matcher.yaml").system == "Match dishes.")
+
+    write(path, MATCHER.replace("{query}", "{dish}"), 1_000_020)  # breaks validation
+    time.sleep(0.3)
+    assert manager.get("matcher.yaml").system == "Match dishes."
+    write(path, MATCHER, 1_000_030)  # the watcher keeps running after the test
+    assert wait_for(lambda: manager.get("matcher.yaml").system == "Match food.")
+
+def test_a_broken_prompt_fails_the_first_load(tmp_path, fast_reload):
+    write(tmp_path / "matcher.yaml", "system: [unclosed", 1_000_000)
+    with pytest.raises(Exception):
+        PromptManager(str(tmp_path))
@@ -0,0 +1,65 @@
+import pytest
+
+from agents.review_analyzer_agent import ReviewAnalyzerAgent, chunk_reviews, review_fingerprint
+from managers.cache_manager import TTLCache
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages[1].content)
+        return type("Response", (), {"content": f"summary {len(self.prompts)}"})()
+
+def review(time, author, text):
+    return {"time": time, "author_name": author, "text": text}
+
+OLD = [review(1, "Ala", "Great pierogi."), review(2, "Ola", "Slow service.")]
+NEW = review(3, "Ela", "The new ramen is excellent.")
+
+@pytest.fixture
+def agent():
+    agent = ReviewAnalyzerAgent(places_tool=object(), llm=FakeLLM(), vector_index=object())
+    agent.store = TTLCache("review_summaries_test", persist=False)
+    return agent
+
+def test_fingerprint_ignores_order_but_not_membership():
+    assert review_fingerprint(OLD) == review_fingerprint(OLD[::-1])
+    assert review_fingerprint(OLD) != review_fingerprint(OLD + [NEW])
+    edited = [dict(OLD[0], text="Edited text."), OLD[1]]
+    assert review_fingerprint(edited) == review_fingerprint(OLD)  # same authors and times
+
+def test_unchanged_reviews_reuse_the_stored_summary(agent):
+    assert agent._summary_for("p1", OLD) == "summary 1"
+    assert agent._summary_for("p1", OLD[::-1]) == "summary 1"
+    assert len(agent.llm.prompts) == 1
+
+def test_summaries_are_kept_per_language(agent):
+    agent._summary_for("p1", OLD, "English")
+    agent._summary_for("p1", OLD, "Polish")
+    assert len(agent.llm.prompts) == 2
+
+def test_new_reviews_update_the_summary_incrementally(agent):
+    agent._summary_for("p1", OLD)
+    assert agent._summary_for("p1", OLD[1:] + [NEW]) == "summary 2"
+    update = agent.llm.prompts[1]
+    assert "summary 1" in update and NEW["text"] in update
+    assert "Great pierogi." not in update and "Slow service." not in update
+
+def test_reviews_that_only_dropped_out_need_no_llm(agent):
+    agent._summary_for("p1", OLD + [NEW])
+    assert agent._summary_for("p1", OLD) == "summary 1"
+    assert len(agent.llm.prompts) == 1
+
+def test_too_much_new_text_is_summarized_from_scratch(agent):
+    agent.chunk_chars = 30
+    agent._summary_for("p1", OLD[:1])
+    agent._summary_for("p1", OLD[:1] + [NEW, review(4, "Iza", "Huge portions of dumplings.")])
+    assert "summary 1" not in "".join(agent.llm.prompts[1:])
+
+def test_long_review_sets_are_mapped_in_chunks_then_reduced(agent):
+    agent.chunk_chars = 30
+    texts = [r["text"] for r in OLD + [NEW]]
+    assert chunk_reviews(texts, 30) == [texts[:2], texts[2:]]
+    assert agent._summarize(texts) == "summary 3"  # two map calls, then the reduce call
+    assert "summary 1" in agent.llm.prompts[2] and "summary 2" in agent.llm.prompts[2]
@@ -0,0 +1,63 @@
+import time
+import asyncio
+
+import pytest
+
+from managers.concurrency_manager import FairScheduler
+from service import AdmissionController, Overloaded
+
+def test_fair_scheduler_serves_waiting_flows_round_robin(run_threads):
+    scheduler = FairScheduler(rate=10, capacity=1)
+    assert scheduler.acquire("warm-up")  # empty the bucket so everyone below has to queue
+    granted = []
+
+    def call(flow):
+        return lambda: scheduler.acquire(flow) and granted.append(flow)
+
+    run_threads(call("a"), call("a"), call("a"), call("b"), stagger=0.005)
+    assert granted == ["a", "b", "a", "a"]
+
+def test_fair_scheduler_timeout_leaves_no_ticket_behind():
+    scheduler = FairScheduler(rate=1, capacity=1)
+    assert scheduler.acquire("a")
+    started = time.monotonic()
+    assert not scheduler.acquire("b", timeout=0.05)
+    assert time.monotonic() - started < 0.5
+    assert scheduler.waiting() == 0
+
+def test_admission_sheds_beyond_active_plus_queued():
+    async def scenario():
+        admission = AdmissionController(max_active=1, max_queued=1, queue_timeout=1)
+        release = asyncio.Event()
+
+        async def search():
+            async with admission.admit():
+                await release.wait()
+
+        first = asyncio.create_task(search())
+        second = asyncio.create_task(search())  # queued behind the first
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded):
+            async with admission.admit():
+                pass
+        release.set()
+        await asyncio.gather(first, second)
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert admission.stats == {"admitted": 2, "shed": 1, "queue_timeouts": 0}
+    assert admission.active == admission.waiting == 0
+
+def test_admission_gives_up_on_a_slot_after_queue_timeout():
+    async def scenario():
+        admission = AdmissionController(max_active=1, max_queued=4, queue_timeout=0.05)
+        async with admission.admit():
+            with pytest.raises(Overloaded):
+                async with admission.admit():
+                    pass
+        async with admission.admit():  # the slot is free again afterwards
+            pass
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert admission.stats["queue_timeouts"] == 1 and admission.waiting == 0
@@ -0,0 +1,74 @@
+import time
+import threading
+
+from managers.cache_manager import TTLCache
+from managers.suggestion_catalog import SuggestionCatalog, load_static_catalog
+
+class FakeSuggester:
+    def __init__(self, general=(("🥐", "Croissant"),), variants=("Butter croissant",)):
+        self.general_items = [list(item) for item in general]
+        self.variant_items = list(variants)
+        self.threads = set()
+        self.calls = 0
+
+    def get_general_suggestions(self, language=None):
+        self.calls += 1
+        self.threads.add(threading.current_thread().name)
+        return self.general_items
+
+    def get_sub_suggestions(self, meal, language=None):
+        self.calls += 1
+        self.threads.add(threading.current_thread().name)
+        return self.variant_items
+
+def make_catalog(suggester, start=False):
+    return SuggestionCatalog(lambda: suggester, cache=TTLCache("suggestions_test", persist=False), start=start)
+
+def drain(catalog):
+    jobs = []
+    while not catalog._jobs.empty():
+        job = catalog._jobs.get_nowait()
+        jobs.append(job)
+        catalog._refresh(job)
+        catalog._queued.discard(job)
+    return jobs
+
+def test_reads_serve_the_bundled_catalog_and_queue_one_refresh():
+    suggester = FakeSuggester()
+    catalog = make_catalog(suggester)
+    assert catalog.general("English") == load_static_catalog()["general"]
+    assert catalog.general(" english ") == load_static_catalog()["general"]
+    assert catalog._jobs.qsize() == 1 and suggester.calls == 0
+
+def test_refresh_stores_the_catalog_and_precomputes_variants():
+    suggester = FakeSuggester()
+    catalog = make_catalog(suggester)
+    catalog.general("Polish")
+    assert drain(catalog) == [("general", "polish"), ("variants", "polish", "croissant")]
+    assert catalog.general("Polish") == [["🥐", "Croissant"]]
+    assert catalog.variants("Croissant ", "Polish") == ["Butter croissant"]
+    assert catalog._jobs.empty()  # fresh entries queue nothing
+
+def test_stale_entries_are_served_while_a_refresh_is_pending():
+    suggester = FakeSuggester()
+    catalog = make_catalog(suggester)
+    catalog.cache.set("general:english", {"items": [["🍕", "Pizza"]], "updated": time.time() - catalog.refresh_interval})
+    assert catalog.general() == [["🍕", "Pizza"]]
+    assert catalog._jobs.qsize() == 1
+
+def test_an_empty_answer_keeps_the_previous_catalog():
+    suggester = FakeSuggester(general=())
+    catalog = make_catalog(suggester)
+    catalog.cache.set("general:english", {"items": [["🍕", "Pizza"]], "updated": 0})
+    catalog.general()
+    drain(catalog)
+    assert catalog.cache.get("general:english")["items"] == [["🍕", "Pizza"]]
+
+def test_only_the_background_worker_calls_the_llm():
+    suggester = FakeSuggester()
+    catalog = make_catalog(suggester, start=True)
+    deadline = time.monotonic() + 3
+    while catalog.variants("croissant", "German") != ["Butter croissant"] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert catalog.general("German") == [["🥐", "Croissant"]]
+    assert threading.current_thread().name not in suggester.threads
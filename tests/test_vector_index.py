@@ -0,0 +1,63 @@
+import uuid
+
+import pytest
+
+from agents.meal_match_agent import MealMatchAgent
+from tools.vector_index import HashingEmbedder, SQLiteVectorStore, VectorIndex, chunk_text
+
+BURGERS = "Angus burger with cheddar, pulled pork burger, fries and milkshakes."
+SUSHI = "Nigiri, maki and uramaki sushi sets, miso soup, edamame."
+
+@pytest.fixture
+def index():
+    store = SQLiteVectorStore(f"test_{uuid.uuid4().hex}")
+    index = VectorIndex(embedder=HashingEmbedder(512), store=store)
+    index.documents.clear()
+    return index
+
+def test_chunks_keep_words_whole():
+    chunks = chunk_text("one two three four five six", size=10, overlap=3)
+    assert all(chunk in "one two three four five six" for chunk in chunks)
+    assert " ".join(chunks).split()[0] == "one" and chunks[-1].endswith("six")
+
+def test_similarities_rank_the_matching_menu_first(index):
+    index.add_document("burgers", "menu", BURGERS)
+    index.add_document("sushi", "menu", SUSHI)
+    scores = index.similarities("burger", ["burgers", "sushi", "never-indexed"])
+    assert set(scores) == {"burgers", "sushi"}
+    assert scores["burgers"] > scores["sushi"]
+
+def test_unchanged_text_is_not_embedded_again(index):
+    calls = []
+    embed = index.embedder.embed_documents
+    index.embedder.embed_documents = lambda texts: calls.append(texts) or embed(texts)
+    index.add_document("burgers", "menu", BURGERS)
+    index.add_document("burgers", "menu", BURGERS)
+    assert len(calls) == 1
+
+def test_expired_documents_drop_their_vectors(index):
+    index.add_document("burgers", "menu", BURGERS)
+    index.documents.set("menu:burgers", {"text": BURGERS, "digest": "", "indexed_at": 0}, ttl=-1)
+    assert index.similarities("burger", ["burgers"]) == {}
+    assert index.store.vectors(["burgers"]) == []
+
+def test_similar_dish_keeps_the_llm(index):
+    agent = MealMatchAgent(places_tool=object(), llm=object(), vector_index=index)
+    agent.skip_llm_without_match = True
+    place = {"place_id": "burgers", "name": "Grill House", "types": ["restaurant"]}
+    index.add_document("burgers", "menu", BURGERS)
+    snippet = agent._menu_snippet("chicken burger", BURGERS)
+    assert snippet  # BM25 found "burger", whatever the cosine says
+    assert not agent._can_skip_llm("chicken burger", place, BURGERS, snippet)
+
+def test_skip_needs_bm25_and_vectors_to_agree(index):
+    agent = MealMatchAgent(places_tool=object(), llm=object(), vector_index=index)
+    agent.skip_llm_without_match = True
+    place = {"place_id": "sushi", "name": "Kaito", "types": ["restaurant"]}
+    assert not agent._can_skip_llm("ramen", place, SUSHI, "")  # not indexed: no vector verdict
+
+    index.add_document("sushi", "menu", SUSHI)
+    agent.min_similarity = -1.0
+    assert not agent._can_skip_llm("ramen", place, SUSHI, "")
+    agent.min_similarity = 1.01
+    assert agent._can_skip_llm("ramen", place, SUSHI, "")
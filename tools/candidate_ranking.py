@@ -0,0 +1,62 @@
+import heapq
+import math
+from itertools import count
+from managers.config_manager import get_setting
+from tools.geo_utils import parse_location, haversine_m
+from tools.menu_snippets import tokenize, token_matches
+
+DEFAULT_WEIGHTS = {"rating": 0.35, "reviews": 0.15, "distance": 0.2, "overlap": 0.3}
+
+class CandidateScorer:
+    """Cheap local relevance score for a Places result, used to pick which candidates get scraped and sent to the LLM."""
+
+    def __init__(self, query: str, location: str, radius: int = None):
+        self.query_tokens = set(tokenize(query))
+        self.origin = parse_location(location)
+        self.radius = float(radius or get_setting("location.default_radius", 5000))
+        self.weights = {**DEFAULT_WEIGHTS, **(get_setting("ranking.weights", {}) or {})}
+        # Ratings are shrunk towards prior_rating, so 5.0 from 3 reviews does not beat 4.7 from 2000.
+        self.prior_rating = float(get_setting("ranking.prior_rating", 4.0))
+        self.prior_reviews = float(get_setting("ranking.prior_reviews", 20))
+        self.reviews_scale = math.log1p(float(get_setting("ranking.reviews_scale", 1000)))
+
+    def score(self, place: dict) -> float:
+        reviews = float(place.get("user_ratings_total") or 0)
+        rating = float(place.get("rating") or 0)
+        smoothed = (rating * reviews + self.prior_rating * self.prior_reviews) / (reviews + self.prior_reviews)
+        parts = {
+            "rating": smoothed / 5,
+            "reviews": min(1.0, math.log1p(reviews) / self.reviews_scale),
+            "distance": self._distance_score(place),
+            "overlap": self._overlap_score(place),
+        }
+        return sum(self.weights[name] * value for name, value in parts.items())
+
+    def _distance_score(self, place: dict) -> float:
+        location = place.get("geometry", {}).get("location", {})
+        if self.origin is None or location.get("lat") is None or location.get("lng") is None:
+            return 0.5
+        distance = haversine_m(self.origin[0], self.origin[1], location["lat"], location["lng"])
+        return max(0.0, 1 - distance / self.radius)
+
+    def _overlap_score(self, place: dict) -> float:
+        if not self.query_tokens:
+            return 0.0
+        place_tokens = set(tokenize(" ".join([place.get("name", "")] + place.get("types", []))))
+        found = [q for q in self.query_tokens if any(token_matches(q, token) for token in place_tokens)]
+        return len(found) / len(self.query_tokens)
+
+def top_k(places, scorer: CandidateScorer, k: int) -> list:
+    """Keeps the k best-scoring places from a (lazy) iterable in a min-heap; returns them best first."""
+    heap, seen, order = [], set(), count()
+    for place in places:
+        key = place.get("place_id") or place.get("name")
+        if key in seen:
+            continue
+        seen.add(key)
+        entry = (scorer.score(place), -next(order), place)  # ties keep Google's order
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+    return [place for _, _, place in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
@@ -0,0 +1,48 @@
+import math
+from typing import Optional, Tuple
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def parse_location(location: str) -> Optional[Tuple[float, float]]:
+    """Parses a "lat,lng" string as passed to the Places API. Returns None for anything else."""
+    try:
+        lat, lng = (float(part) for part in str(location).split(","))
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+def geohash_encode(lat: float, lng: float, precision: int = 6) -> str:
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+def location_cell(location: str, precision: int = 6) -> str:
+    """Quantizes a "lat,lng" string to its geohash cell so nearby locations share a key."""
+    coords = parse_location(location)
+    if coords is None:
+        return " ".join(str(location or "").lower().split())
+    return geohash_encode(coords[0], coords[1], precision)
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    radius = 6371000.0
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * radius * math.asin(math.sqrt(a))
@@ -0,0 +1,73 @@
+from urllib.parse import urlencode
+from managers.cache_manager import get_cache
+from managers.concurrency_manager import TokenBucket, get_single_flight
+from managers.config_manager import get_config, get_setting
+from tools.google_places_tool import normalize_query
+from managers.tracing import span
+from tools.http_transport import DeadlineExceeded, http_get, remaining_time
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org"
+HEADERS = {"User-Agent": "SmartMealFinder/1.0"}
+
+# Shared by every GeocodingTool in the process: Nominatim allows at most 1 request per second.
+_nominatim_bucket = TokenBucket(
+    rate=float(get_setting("geocoding.rate_per_second", 1)),
+    capacity=float(get_setting("geocoding.burst", 1)),
+)
+_in_flight = get_single_flight("geocoding")
+
+def _take_nominatim_token():
+    # Like concurrency_manager.limit: waiting for a token past the search deadline is pointless.
+    with span("quota_wait", backend="nominatim"):
+        acquired = _nominatim_bucket.acquire(timeout=remaining_time())
+    if not acquired:
+        raise DeadlineExceeded("no Nominatim token available before the deadline")
+
+class GeocodingTool:
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else get_cache("geocoding", max_entries=5000)
+        self.base_url = get_config("NOMINATIM_URL", NOMINATIM_URL).rstrip("/")
+        self.forward_ttl = float(get_setting("geocoding.forward_ttl", 2592000))
+        self.reverse_ttl = float(get_setting("geocoding.reverse_ttl", 604800))
+        self.reverse_precision = int(get_setting("geocoding.reverse_precision", 4))
+
+    def geocode(self, location_name: str) -> str:
+        """Returns "lat,lon" for a free-text location, or an empty string when it cannot be found."""
+        key = f"forward:{normalize_query(location_name)}"
+        params = {"q": location_name, "format": "json", "limit": 1}
+        data = self._lookup(key, "search", params, self.forward_ttl)
+        if data:
+            return f"{data[0]['lat']},{data[0]['lon']}"
+        return ""
+
+    def reverse_geocode(self, lat: float, lon: float) -> str:
+        """Returns the display name for coordinates, rounded so small GPS jitter hits the cache."""
+        lat, lon = round(float(lat), self.reverse_precision), round(float(lon), self.reverse_precision)
+        key = f"reverse:{lat},{lon}"
+        data = self._lookup(key, "reverse", {"lat": lat, "lon": lon, "format": "json"}, self.reverse_ttl)
+        return (data or {}).get("display_name", "")
+
+    def _lookup(self, key: str, endpoint: str, params: dict, ttl: float):
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        # Identical lookups already in flight share one request instead of queueing behind the rate limit.
+        return _in_flight.do(key, self._fetch, key, endpoint, params, ttl)
+
+    def _fetch(self, key: str, endpoint: str, params: dict, ttl: float):
+        cached = self.cache.get(key, record=False)
+        if cached is not None:
+            return cached
+        try:
+            # Every attempt, retries included, waits for its own token: a 429 is no reason to speed up.
+            response = http_get(f"{self.base_url}/{endpoint}?{urlencode(params)}", "nominatim",
+                                before_attempt=_take_nominatim_token, headers=HEADERS)
+        except Exception as e:
+            print(f"⚠️ Geocoding failed: {e}")
+            return None
+        if response.status_code != 200:
+            print(f"⚠️ Nominatim error: {response.status_code}")
+            return None
+        data = response.json()
+        self.cache.set(key, data, ttl=ttl)
+        return data
@@ -1,47 +1,169 @@
 import warnings
 warnings.filterwarnings("ignore")
 import os
-import requests
-from typing import List, Dict
+import time
+import unicodedata
+from typing import List, Dict, Iterator, Tuple
 from dotenv import load_dotenv
 from typing import Optional
+from managers.concurrency_manager import limit, get_single_flight
+from managers.cache_manager import get_cache
+from managers.config_manager import get_config, get_setting
+from tools.geo_utils import location_cell
+from tools.http_transport import http_get, remaining_time
 
 load_dotenv()
 
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
+PLACES_API_URL = "https://maps.googleapis.com/maps/api/place"
+
+CACHEABLE_STATUSES = ("OK", "ZERO_RESULTS")
+
+# Identical lookups from concurrent searches (same query and cell, same place_id) hit Google once.
+_in_flight = get_single_flight("places")
+
+def default_places_cache():
+    if not get_setting("cache.places.enabled", True):
+        return None
+    return get_cache("places", max_entries=int(get_setting("cache.places.max_entries", 2000)))
+
+def normalize_query(query: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", query or "").casefold().split())
 
 class GooglePlacesTool:
-    def __init__(self, api_key: str = GOOGLE_MAPS_API_KEY):
+    def __init__(self, api_key: str = GOOGLE_MAPS_API_KEY, cache=None):
         self.api_key = api_key
+        self.base_url = get_config("PLACES_API_URL", PLACES_API_URL).rstrip("/")
+        # Any object with get(key) / set(key, value, ttl=...) works as a cache backend.
+        self.cache = cache if cache is not None else default_places_cache()
+        self.search_ttl = float(get_setting("cache.places.search_ttl", 900))
+        self.details_ttl = float(get_setting("cache.places.details_ttl", 86400))
+        self.geohash_precision = int(get_setting("cache.places.geohash_precision", 6))
+        self.page_delay = float(get_setting("location.page_delay", 2))
 
     def search_places(self, query: str, location: str, radius: Optional[int] = None) -> List[Dict]:
-        url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+        """First page of Text Search results (up to 20 places)."""
+        results, _ = self._search_page(query, location, radius)
+        return results
+
+    def search_places_iter(self, query: str, location: str, radius: Optional[int] = None,
+                           max_results: Optional[int] = None) -> Iterator[Dict]:
+        """Yields places across result pages, requesting the next page only when the caller asks for more."""
+        max_results = max_results or int(get_setting("location.max_results", 20))
+        yielded, page, token = 0, 0, None
+        while yielded < max_results:
+            results, token = self._search_page(query, location, radius, page, token)
+            for place in results[:max_results - yielded]:
+                yield place
+                yielded += 1
+            page += 1
+            if not token:
+                return
+
+    def _search_page(self, query: str, location: str, radius: Optional[int] = None,
+                     page: int = 0, page_token: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        cache_key = f"search:{normalize_query(query)}:{location_cell(location, self.geohash_precision)}:{radius or ''}"
+        if page:
+            cache_key += f":page{page}"
+        return _in_flight.do(cache_key, self._load_search_page, cache_key, query, location, radius, page_token)
+
+    def _load_search_page(self, cache_key: str, query: str, location: str, radius: Optional[int],
+                          page_token: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if isinstance(cached, dict):
+                return cached["results"], cached.get("next_page_token")
+
+        if page_token:
+            remaining = remaining_time()
+            if remaining is not None and remaining < self.page_delay:
+                return [], None  # not worth waiting for another page past the search deadline
+            # A next_page_token becomes valid a couple of seconds after it is issued; cached pages skip this.
+            time.sleep(self.page_delay)
+
+        url = f"{self.base_url}/textsearch/json"
+        if page_token:
+            params = {"pagetoken": page_token, "key": self.api_key}
+        else:
+            params = {
+                "query": query,
+                "location": location,
+                "radius": radius,
+                "key": self.api_key
+            }
+            if radius:
+                params["radius"] = radius
+        for attempt in range(2):
+            with limit("google"):
+                response = http_get(url, "google", params=params)
+            if response.status_code != 200:
+                print(f"Google Maps API Error: {response.status_code}")
+                return [], None
+            data = response.json()
+            if not (page_token and data.get("status") == "INVALID_REQUEST" and attempt == 0):
+                break
+            time.sleep(self.page_delay)  # token not active yet
+
+        results = data.get("results", [])
+        next_token = data.get("next_page_token")
+        if self.cache is not None and data.get("status", "OK") in CACHEABLE_STATUSES:
+            self.cache.set(cache_key, {"results": results, "next_page_token": next_token}, ttl=self.search_ttl)
+        return results, next_token
+
+    def get_place_details(self, place_id: str) -> Dict:
+        return _in_flight.do(f"details:{place_id}", self._load_place_details, place_id)
+
+    def _load_place_details(self, place_id: str) -> Dict:
+        cache_key = f"details:{place_id}"
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        url = f"{self.base_url}/details/json"
         params = {
-            "query": query,
-            "location": location,
-            "radius": radius,
+            "place_id": place_id,
+            "fields": "name,rating,review,user_ratings_total,formatted_address,opening_hours,price_level",
             "key": self.api_key
         }
-        if radius:
-            params["radius"] = radius
-        response = requests.get(url, params=params)
+        with limit("google"):
+            response = http_get(url, "google", params=params)
         if response.status_code == 200:
             data = response.json()
-            return data.get("results", [])
+            result = data.get("result", {})
+            if self.cache is not None and data.get("status", "OK") == "OK":
+                self.cache.set(cache_key, result, ttl=self.details_ttl)
+            return result
         else:
-            print(f"Google Maps API Error: {response.status_code}")
-            return []
+            print(f"Details API Error: {response.status_code}")
+            return {}
 
-    def get_place_details(self, place_id: str) -> Dict:
-        url = "https://maps.googleapis.com/maps/api/place/details/json"
+    def get_place_reviews(self, place_id: str, sort: str = "most_relevant") -> List[Dict]:
+        """Reviews in one sort order (most_relevant or newest); Google returns at most 5 per order."""
+        return _in_flight.do(f"reviews:{sort}:{place_id}", self._load_place_reviews, place_id, sort)
+
+    def _load_place_reviews(self, place_id: str, sort: str) -> List[Dict]:
+        cache_key = f"reviews:{sort}:{place_id}"
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        url = f"{self.base_url}/details/json"
         params = {
             "place_id": place_id,
-            "fields": "name,rating,review,user_ratings_total,formatted_address,opening_hours,price_level",
+            "fields": "review",
+            "reviews_sort": sort,
             "key": self.api_key
         }
-        response = requests.get(url, params=params)
+        with limit("google"):
+            response = http_get(url, "google", params=params)
         if response.status_code == 200:
-            return response.json().get("result", {})
+            data = response.json()
+            reviews = data.get("result", {}).get("reviews", [])
+            if self.cache is not None and data.get("status", "OK") == "OK":
+                self.cache.set(cache_key, reviews, ttl=self.details_ttl)
+            return reviews
         else:
             print(f"Details API Error: {response.status_code}")
-            return {}
+            return []
@@ -0,0 +1,100 @@
+import time
+import random
+import threading
+import contextvars
+from typing import Optional
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from managers.config_manager import get_setting
+from managers.tracing import span, count
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    pass
+
+def set_deadline(expires_at: Optional[float]):
+    """Sets the monotonic end-to-end deadline for every HTTP call made in the current context."""
+    _deadline.set(expires_at)
+
+def remaining_time() -> Optional[float]:
+    expires_at = _deadline.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+def check_deadline():
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("search deadline exceeded")
+
+def with_current_context(fn):
+    """Wraps fn so it runs in a copy of the caller's context (deadline, tracing) when used from worker threads."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+class HttpTransport:
+    """One keep-alive session with per-backend timeouts and jittered retries on 429/5xx.
+
+    urllib3 keeps a connection pool per host and closes the least recently used one beyond
+    http.pool_hosts, so scraping many restaurant sites does not pile up idle sockets.
+    """
+
+    def __init__(self):
+        self.backoff = float(get_setting("http.backoff", 0.5))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=int(get_setting("http.pool_hosts", 32)),
+                              pool_maxsize=int(get_setting("http.pool_maxsize", 20)))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, backend: str, before_attempt=None, **kwargs) -> requests.Response:
+        """`before_attempt` runs before every attempt, retries included, e.g. to take a rate-limit token."""
+        timeout = float(get_setting(f"http.timeouts.{backend}", 10))
+        retries = int(get_setting(f"http.retries.{backend}", 0))
+
+        with span(f"http.{backend}", host=urlparse(url).netloc):
+            for attempt in range(retries + 1):
+                check_deadline()
+                if before_attempt is not None:
+                    before_attempt()
+                remaining = remaining_time()
+                count("upstream_requests", backend=backend)
+                try:
+                    response = self.session.get(url, timeout=timeout if remaining is None else min(timeout, remaining), **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    count("upstream_errors", backend=backend)
+                    if attempt == retries:
+                        raise
+                    self._sleep_before_retry(attempt)
+                    continue
+
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    if response.status_code >= 400:
+                        count("upstream_errors", backend=backend)
+                    return response
+                count("upstream_errors", backend=backend)
+                retry_after = response.headers.get("Retry-After", "")
+                response.close()
+                self._sleep_before_retry(attempt, float(retry_after) if retry_after.isdigit() else 0.0)
+
+    def _sleep_before_retry(self, attempt: int, at_least: float = 0.0):
+        delay = max(at_least, random.uniform(0, self.backoff * 2 ** attempt))
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            raise DeadlineExceeded("search deadline exceeded while backing off")
+        time.sleep(delay)
+
+_transport = None
+_transport_lock = threading.Lock()
+
+def get_transport() -> HttpTransport:
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
+
+def http_get(url: str, backend: str, before_attempt=None, **kwargs) -> requests.Response:
+    return get_transport().get(url, backend, before_attempt=before_attempt, **kwargs)
@@ -0,0 +1,118 @@
+import time
+import importlib.util
+from urllib.parse import urljoin, urlparse
+from managers.cache_manager import get_cache
+from managers.concurrency_manager import limit, get_single_flight
+from managers.config_manager import get_setting
+from managers.tracing import span, count
+from tools.http_transport import http_get
+
+# lxml is several times faster than the stdlib parser; fall back when it is not installed.
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+NOISE_TAGS = ["script", "style", "noscript", "nav", "footer", "header", "svg", "iframe", "form", "template"]
+MENU_LINK_KEYWORDS = ("menu", "menü", "karta", "carte", "speisekarte", "jadlospis", "jadłospis", "food", "dania")
+HEADERS = {"User-Agent": "SmartMealFinder/1.0", "Accept": "text/html,application/xhtml+xml"}
+
+_in_flight = get_single_flight("pages")
+
+class MenuFetcher:
+    def __init__(self, cache=None):
+        self.max_bytes = int(get_setting("scraper.max_bytes", 500000))
+        self.max_text_chars = int(get_setting("scraper.max_text_chars", 20000))
+        self.follow_menu_links = int(get_setting("scraper.follow_menu_links", 1))
+        self.fresh_ttl = float(get_setting("scraper.fresh_ttl", 3600))
+        self.cache_ttl = float(get_setting("scraper.cache_ttl", 604800))
+        self.cache = cache if cache is not None else get_cache("pages", max_entries=500, default_ttl=self.cache_ttl)
+
+    def fetch(self, url: str) -> str:
+        """Returns readable text of the page plus likely menu pages it links to (menu pages first)."""
+        with span("scrape", host=urlparse(url).netloc):
+            page = self._fetch_page(url)
+            if page is None:
+                return ""
+            texts = [self._fetch_linked_page(link) for link in page["menu_links"][:self.follow_menu_links]]
+        texts = [linked["text"] for linked in texts if linked and linked["text"]] + [page["text"]]
+        return " ".join(texts)[:self.max_text_chars]
+
+    def _fetch_linked_page(self, url: str):
+        # A broken menu link must not cost us the homepage text we already have.
+        try:
+            return self._fetch_page(url)
+        except Exception as e:
+            print(f"⚠️ Skipping menu link {url}: {e}")
+            return None
+
+    def _fetch_page(self, url: str):
+        # Searches that scrape the same restaurant at the same time share one download and parse.
+        return _in_flight.do(url, self._load_page, url)
+
+    def _load_page(self, url: str):
+        cache_key = f"page:{url}"
+        cached = self.cache.get(cache_key) if self.cache is not None else None
+        if cached and time.time() - cached["fetched_at"] < self.fresh_ttl:
+            return cached
+
+        headers = dict(HEADERS)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        with limit("websites"):
+            with http_get(url, "websites", headers=headers, stream=True) as res:
+                if res.status_code == 304 and cached:
+                    cached["fetched_at"] = time.time()
+                    self._store(cache_key, cached)
+                    return cached
+                if res.status_code != 200:
+                    print(f"⚠️ Menu page {url} returned HTTP {res.status_code}")
+                    return None
+                content_type = res.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if content_type and content_type not in HTML_CONTENT_TYPES:
+                    return None
+                body = self._read_capped(res)
+                # Without an explicit charset let the parser sniff <meta charset> instead of assuming Latin-1.
+                encoding = res.encoding if "charset=" in res.headers.get("Content-Type", "").lower() else None
+                etag, last_modified = res.headers.get("ETag"), res.headers.get("Last-Modified")
+
+        count("scraped_bytes", len(body))
+        count("scraped_pages")
+        with span("parse_html", bytes=len(body)):
+            page = self._parse(url, body, encoding)
+        page.update({"etag": etag, "last_modified": last_modified, "fetched_at": time.time()})
+        self._store(cache_key, page)
+        return page
+
+    def _read_capped(self, res) -> bytes:
+        chunks, size = [], 0
+        for chunk in res.iter_content(chunk_size=16384):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                break
+        return b"".join(chunks)[:self.max_bytes]
+
+    def _parse(self, url: str, body: bytes, encoding: str = None) -> dict:
+        from bs4 import BeautifulSoup  # loaded on the first scrape, not at startup
+
+        soup = BeautifulSoup(body, HTML_PARSER, from_encoding=encoding)
+        menu_links = []
+        host = urlparse(url).netloc
+        for anchor in soup.find_all("a", href=True):
+            label = f"{anchor.get_text(' ', strip=True)} {anchor['href']}".lower()
+            link = urljoin(url, anchor["href"]).split("#")[0]
+            if (any(keyword in label for keyword in MENU_LINK_KEYWORDS) and urlparse(link).netloc == host
+                    and link.rstrip("/") != url.rstrip("/") and link not in menu_links):
+                menu_links.append(link)
+
+        for node in soup(NOISE_TAGS):
+            node.decompose()
+        text = " ".join(soup.stripped_strings)[:self.max_text_chars]
+        return {"text": text, "menu_links": menu_links}
+
+    def _store(self, cache_key: str, page: dict):
+        if self.cache is not None:
+            self.cache.set(cache_key, page, ttl=self.cache_ttl)
@@ -0,0 +1,91 @@
+import re
+import math
+import unicodedata
+from collections import Counter
+from managers.config_manager import get_setting
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)  # underscores split, so "sushi_restaurant" yields "sushi"
+# Letters NFKD does not decompose into base letter + accent.
+_FOLD = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "ß": "ss", "æ": "ae", "œ": "oe"})
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", (text or "").casefold().translate(_FOLD))
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+# Plural and case endings (English, Polish, German) stripped once, longest first, keeping a 4-letter stem.
+_SUFFIXES = ("ami", "ach", "ies", "es", "ow", "om", "s", "y", "a", "e", "i")
+
+def stem(token: str) -> str:
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[:-len(suffix)]
+    return token
+
+def tokenize(text: str) -> list:
+    """Accent-folded, lightly stemmed tokens, so inflected forms (pizza/pizzy, burger/burgers) meet."""
+    return [stem(token) for token in _TOKEN_RE.findall(normalize(text)) if len(token) > 1 and not token.isdigit()]
+
+def token_matches(query_token: str, token: str) -> bool:
+    """Same stem, or a compound ending in the query word (cheeseburger, Currywurst) for words of 4+ letters."""
+    return token == query_token or (len(query_token) >= 4 and token.endswith(query_token))
+
+def mentions(query: str, text: str) -> bool:
+    """True when any query word appears in the text, compounds included."""
+    query_tokens = set(tokenize(query))
+    return any(token_matches(q, token) for token in set(tokenize(text)) for q in query_tokens)
+
+def _term_counts(query_tokens: set, doc: list) -> dict:
+    counts = Counter(doc)
+    return {q: sum(n for token, n in counts.items() if token_matches(q, token)) for q in query_tokens}
+
+def chunk_words(text: str, size: int, overlap: int) -> list:
+    words = (text or "").split()
+    step = max(1, size - overlap)
+    return [" ".join(words[start:start + size]) for start in range(0, max(len(words) - overlap, 1), step)]
+
+def bm25_scores(query_tokens: list, docs: list, k1: float = 1.5, b: float = 0.75) -> list:
+    if not docs:
+        return []
+    query_tokens = set(query_tokens)
+    avg_len = sum(len(doc) for doc in docs) / len(docs) or 1.0
+    doc_counts = [_term_counts(query_tokens, doc) for doc in docs]
+    doc_freq = Counter(token for counts in doc_counts for token, tf in counts.items() if tf)
+    scores = []
+    for doc, counts in zip(docs, doc_counts):
+        score = 0.0
+        for token in query_tokens:
+            tf = counts[token]
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - doc_freq[token] + 0.5) / (doc_freq[token] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg_len))
+        scores.append(score)
+    return scores
+
+class MenuSnippetExtractor:
+    """Picks the parts of a scraped page that are relevant to the query and packs them into a token budget."""
+
+    def __init__(self):
+        self.chunk_size = int(get_setting("relevance.chunk_words", 60))
+        self.chunk_overlap = int(get_setting("relevance.chunk_overlap", 15))
+        self.token_budget = int(get_setting("relevance.token_budget", 250))
+        self.min_score = float(get_setting("relevance.min_score", 0.0))
+
+    def extract(self, query: str, text: str) -> tuple:
+        """Returns (snippet, best_score); the snippet is empty when no chunk scores above min_score."""
+        chunks = chunk_words(text, self.chunk_size, self.chunk_overlap)
+        scores = bm25_scores(tokenize(query), [tokenize(chunk) for chunk in chunks])
+        ranked = sorted((i for i, score in enumerate(scores) if score > self.min_score), key=lambda i: -scores[i])
+
+        budget_chars = self.token_budget * 4  # ~4 characters per token
+        picked, used = [], 0
+        for i in ranked:
+            if used + len(chunks[i]) > budget_chars and picked:
+                continue
+            picked.append(i)
+            used += len(chunks[i])
+            if used >= budget_chars:
+                break
+
+        snippet = " … ".join(chunks[i] for i in sorted(picked))[:budget_chars]
+        return snippet, max(scores, default=0.0)
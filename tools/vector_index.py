@@ -0,0 +1,186 @@
+import os
+import json
+import math
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+import importlib.util
+from managers.cache_manager import CACHE_DIR, get_cache
+from managers.config_manager import get_setting
+from managers.tracing import span
+from tools.menu_snippets import tokenize
+
+# chromadb is optional; without it chunks are kept in a SQLite table next to the other caches.
+HAS_CHROMADB = importlib.util.find_spec("chromadb") is not None
+
+def chunk_text(text: str, size: int, overlap: int) -> list:
+    """Character windows of `size` with `overlap`, cut back to the last space so words stay whole."""
+    text = " ".join((text or "").split())
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text) and " " in text[start:end]:
+            end = text.rindex(" ", start, end)
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(start + 1, end - overlap)
+    return [chunk for chunk in chunks if chunk]
+
+def cosine(a: list, b: list) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+class HashingEmbedder:
+    """Offline embedder: signed feature hashing of accent-folded word stems and their bigrams."""
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+        self.name = f"hashing{dimensions}v2"  # bumped when tokenize changes, old vectors are not comparable
+
+    def _embed(self, text: str) -> list:
+        vector = [0.0] * self.dimensions
+        tokens = tokenize(text)
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dimensions] += 1.0 if h & 0x80000000 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts: list) -> list:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self._embed(text)
+
+class OpenAIEmbedder:
+    def __init__(self, model: str):
+        from langchain_community.embeddings import OpenAIEmbeddings
+        from managers.concurrency_manager import limit
+        self._limit = limit
+        self.model = OpenAIEmbeddings(model=model)
+        self.name = model.replace("-", "_")
+
+    def embed_documents(self, texts: list) -> list:
+        with self._limit("openai"):
+            return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list:
+        with self._limit("openai"):
+            return self.model.embed_query(text)
+
+def get_embedder(backend: str = None):
+    backend = backend or get_setting("rag.embedder", "hashing")
+    if backend == "openai":
+        return OpenAIEmbedder(get_setting("rag.embedding_model", "text-embedding-ada-002"))
+    if backend == "hashing":
+        return HashingEmbedder(int(get_setting("rag.hashing_dimensions", 512)))
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+class SQLiteVectorStore:
+    def __init__(self, name: str):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(CACHE_DIR, f"{name}.sqlite3"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS chunks "
+                         "(id TEXT PRIMARY KEY, place_id TEXT, kind TEXT, text TEXT, vector TEXT)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_place ON chunks (place_id)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def replace(self, place_id: str, kind: str, ids: list, texts: list, vectors: list):
+        with self._lock:
+            self._db.execute("DELETE FROM chunks WHERE place_id = ? AND kind = ?", (place_id, kind))
+            self._db.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)", [
+                (chunk_id, place_id, kind, text, json.dumps(vector))
+                for chunk_id, text, vector in zip(ids, texts, vectors)
+            ])
+            self._db.commit()
+
+    def vectors(self, place_ids: list) -> list:
+        """Returns (place_id, kind, vector) for every chunk of the given places."""
+        if not place_ids:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT place_id, kind, vector FROM chunks WHERE place_id IN ({','.join('?' * len(place_ids))})",
+                list(place_ids)
+            ).fetchall()
+        return [(place_id, kind, json.loads(vector)) for place_id, kind, vector in rows]
+
+class ChromaVectorStore:
+    def __init__(self, name: str):
+        import chromadb
+        client = chromadb.PersistentClient(path=os.path.join(CACHE_DIR, "chroma"))
+        self._collection = client.get_or_create_collection(name, metadata={"hnsw:space": "cosine"})
+
+    def replace(self, place_id: str, kind: str, ids: list, texts: list, vectors: list):
+        self._collection.delete(where={"$and": [{"place_id": place_id}, {"kind": kind}]})
+        if ids:
+            self._collection.upsert(ids=ids, embeddings=vectors, documents=texts,
+                                    metadatas=[{"place_id": place_id, "kind": kind}] * len(ids))
+
+    def vectors(self, place_ids: list) -> list:
+        if not place_ids:
+            return []
+        found = self._collection.get(where={"place_id": {"$in": list(place_ids)}},
+                                     include=["embeddings", "metadatas"])
+        return [(meta["place_id"], meta["kind"], list(vector))
+                for meta, vector in zip(found["metadatas"], found["embeddings"])]
+
+class VectorIndex:
+    """Per-place_id index of scraped menus and review texts, chunked with the `rag` settings.
+
+    The source text and digest of every document are kept too, so unchanged text is not embedded
+    again. Chunks whose document entry has expired (rag.document_ttl) are dropped on the next lookup.
+    """
+
+    def __init__(self, embedder=None, store=None):
+        self.embedder = embedder or get_embedder()
+        self.chunk_size = int(get_setting("rag.chunk_size", 500))
+        self.chunk_overlap = int(get_setting("rag.chunk_overlap", 50))
+        # Each embedder gets its own collection: vectors of different models are not comparable.
+        name = f"{get_setting('rag.collection_name', 'restaurant_reviews')}_{self.embedder.name}"
+        if store is None:
+            store = ChromaVectorStore(name) if HAS_CHROMADB else SQLiteVectorStore(name)
+        self.store = store
+        self.documents = get_cache(f"{name}_documents", max_entries=5000,
+                                   default_ttl=float(get_setting("rag.document_ttl", 604800)))
+
+    def get_document(self, place_id: str, kind: str):
+        """Indexed source text, or None when the place has not been indexed (or the entry expired)."""
+        document = self.documents.get(f"{kind}:{place_id}")
+        return document["text"] if document is not None else None
+
+    def add_document(self, place_id: str, kind: str, text: str):
+        digest = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+        document = self.documents.get(f"{kind}:{place_id}")
+        if document is not None and document["digest"] == digest:
+            return  # unchanged, keep the existing vectors
+        chunks = chunk_text(text, self.chunk_size, self.chunk_overlap)
+        with span("index_document", kind=kind, chunks=len(chunks)):
+            vectors = self.embedder.embed_documents(chunks) if chunks else []
+            ids = [f"{kind}:{place_id}:{i}" for i in range(len(chunks))]
+            self.store.replace(place_id, kind, ids, chunks, vectors)
+        self.documents.set(f"{kind}:{place_id}", {"text": text, "digest": digest, "indexed_at": time.time()})
+
+    def similarities(self, query: str, place_ids: list, kinds: tuple = None) -> dict:
+        """Best chunk cosine similarity per place_id; places without indexed chunks are left out."""
+        place_ids = [place_id for place_id in dict.fromkeys(place_ids) if place_id]
+        rows = [row for row in self.store.vectors(place_ids) if kinds is None or row[1] in kinds]
+        live = {}
+        for place_id, kind, _ in rows:
+            if (place_id, kind) not in live:
+                live[place_id, kind] = self.documents.get(f"{kind}:{place_id}", record=False) is not None
+                if not live[place_id, kind]:
+                    self.store.replace(place_id, kind, [], [], [])
+        rows = [row for row in rows if live[row[0], row[1]]]
+        if not rows:
+            return {}
+        query_vector = self.embedder.embed_query(query)
+        scores = {}
+        for place_id, _, vector in rows:
+            scores[place_id] = max(scores.get(place_id, -1.0), cosine(query_vector, vector))
+        return scores
@@ -1,44 +1,198 @@
 import os
+import time
+import queue
+import contextvars
 import warnings
 warnings.filterwarnings("ignore")
-from agents.meal_match_agent import MealMatchAgent
-from agents.review_analyzer_agent import ReviewAnalyzerAgent
+from agents.meal_match_agent import MealMatchAgent, NO_MENU_MATCH
+from agents.review_analyzer_agent import ReviewAnalyzerAgent, NO_REVIEWS_SUMMARY
 from agents.translator_agent import TranslationAgent
+from managers.config_manager import get_setting
+from managers.prompt_manager import is_english
+from managers.tracing import span, start_trace, current_trace
+from tools.http_transport import DeadlineExceeded, set_deadline
+from concurrent.futures import ThreadPoolExecutor, Future
 from dotenv import load_dotenv
 
 load_dotenv()
 
+STATIC_SUMMARIES = {NO_MENU_MATCH, NO_REVIEWS_SUMMARY}
+
+def traced(stage: str, fn, *args, **kwargs):
+    with span(stage):
+        return fn(*args, **kwargs)
+
 class MealRecommendationWorkflow:
     def __init__(self, language: str = "English"):
         self.api_key = os.getenv("GOOGLE_MAPS_API_KEY")
         self.meal_agent = MealMatchAgent(self.api_key)
         self.review_agent = ReviewAnalyzerAgent(self.api_key)
+        # Default for searches that do not pass their own language; agents hold no per-request state.
         self.language = language
-        self.translator = None if language.lower() in ["english", "en"] else TranslationAgent(language)
+        self.translator = TranslationAgent()
+        # "direct": agents answer in the target language; "batch": one translation call per search.
+        self.translation_mode = get_setting("translation.mode", "direct")
+        self.batch_matching = bool(get_setting("matching.batch", True))
+
+    def run(self, user_meal: str, user_location: str, radius: int = 1500, deadline: float = None,
+            language: str = None) -> list:
+        results = {}
+        for event in self.run_iter(user_meal, user_location, radius=radius, deadline=deadline, language=language):
+            if event["event"] == "result":
+                results[event["index"]] = event["recommendation"]
+        return [results[index] for index in sorted(results)]
+
+    def run_iter(self, user_meal: str, user_location: str, radius: int = 1500, deadline: float = None,
+                 language: str = None):
+        """Yields stage events as they happen and each enriched recommendation as soon as it is ready.
 
-    def run(self, user_meal: str, user_location: str, radius: int = 1500) -> list:
+        Events are dicts with an "event" key: "places_found", "match_done", "reviews_done",
+        "result" (carries "recommendation"), "error" and "deadline". Place events carry the place
+        "index" in candidate ranking order, so callers can restore it. After `deadline`
+        seconds (http.search_deadline by default) the search stops and keeps what is ready.
+        The last event is "trace": spans and counters of this search (see managers.tracing).
+        """
         print(f"Searching for: {user_meal} near {user_location}...\n")
-        meals = self.meal_agent.find_meals(user_meal, user_location, radius=radius)
+        if deadline is None:
+            deadline = float(get_setting("http.search_deadline", 45))
+        expires_at = time.monotonic() + deadline if deadline else None
+        # Every stage runs in a copy of this context so HTTP calls see the search deadline and trace.
+        context = contextvars.copy_context()
+        context.run(set_deadline, expires_at)
+        # A caller that already traces (app.py --profile) gets this search inside its own trace.
+        trace = context.run(current_trace)
+        owns_trace = trace is None
+        if owns_trace:
+            trace = context.run(start_trace, "search", meal=user_meal, location=user_location)
+
+        yield from self._events(context, user_meal, user_location, radius, expires_at, language)
+        if owns_trace:
+            trace.finish()
+        yield {"event": "trace", "trace": trace.to_dict()}
+
+    def _events(self, context, user_meal: str, user_location: str, radius: int, expires_at: float,
+                language: str = None):
+        language = language or self.language
+        translate = not is_english(language)
+        prompt_language = language if translate and self.translation_mode == "direct" else None
+        translate_at_end = translate and self.translation_mode == "batch"
+
+        try:
+            places = context.run(traced, "search_places", self.meal_agent.search_candidates,
+                                 user_meal, user_location, radius=radius)
+        except DeadlineExceeded:
+            yield {"event": "deadline", "pending": 0}
+            return
+        yield {"event": "places_found", "count": len(places), "names": [p.get("name") for p in places]}
+        if not places:
+            return
+
+        # Each place runs as an independent pipeline; per-backend limits live in the tools/agents.
+        events = queue.Queue()
+        max_workers = min(len(places), int(get_setting("concurrency.max_workers", 10)))
+        executor = ThreadPoolExecutor(max_workers=max_workers + (1 if self.batch_matching else 0))
+        try:
+            if self.batch_matching:
+                # Submitted first so it owns a worker while the per-place pipelines fetch reviews.
+                verdicts = [Future() for _ in places]
+                executor.submit(context.copy().run, traced, "match_batch", self._match_batch,
+                                user_meal, places, prompt_language, verdicts)
+                match = lambda index, place: verdicts[index].result()
+            else:
+                match = lambda index, place: self.meal_agent.match_place(user_meal, place, prompt_language)
+
+            # Places whose indexed menu/reviews look most relevant get a worker first.
+            for index in context.run(traced, "rank", self.meal_agent.rank_candidates, user_meal, places):
+                place = places[index]
+                executor.submit(context.copy().run, self._process_place,
+                                index, user_location, place, match, events.put, prompt_language)
+
+            finished = []
+            pending = len(places)
+            while pending:
+                try:
+                    event = events.get(timeout=None if expires_at is None else max(0, expires_at - time.monotonic()))
+                except queue.Empty:
+                    print(f"⚠️ Search deadline reached, returning partial results ({pending} places unfinished)")
+                    yield {"event": "deadline", "pending": pending}
+                    break
+                if event["event"] in ("result", "skipped", "error"):
+                    pending -= 1
+                if event["event"] == "result" and translate_at_end:
+                    finished.append(event)
+                elif event["event"] != "skipped":
+                    yield event
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if finished and (expires_at is None or time.monotonic() < expires_at):
+            yield from context.run(traced, "translate", self._translate_results, finished, language)
+        else:
+            yield from finished
+
+    def _match_batch(self, user_meal: str, places: list, prompt_language: str, verdicts: list):
+        """Resolves each place's future as early as its verdict is known; the rest when the batch call returns."""
+        def settle(index: int, recommendation: dict):
+            if not verdicts[index].done():
+                verdicts[index].set_result(recommendation)
+        try:
+            for index, recommendation in enumerate(
+                self.meal_agent.match_places(user_meal, places, prompt_language, on_ready=settle)
+            ):
+                settle(index, recommendation)
+        except Exception as e:
+            for verdict in verdicts:
+                if not verdict.done():
+                    verdict.set_exception(e)
+            raise
+
+    def _translate_results(self, events: list, language: str) -> list:
+        recommendations = [event["recommendation"] for event in events]
+        texts = [r.get(field) for r in recommendations for field in ("match_summary", "summary")]
+        translated = iter(self.translator.translate_batch(texts, language))
+        for r in recommendations:
+            r["match_summary"] = next(translated)
+            r["summary"] = next(translated)
+        return events
+
+    def _process_place(self, index: int, user_location: str, place: dict, match, emit,
+                       prompt_language: str = None) -> None:
+        with span("place", index=index, name=place.get("name")):
+            self._run_place(index, user_location, place, match, emit, prompt_language)
 
-        final_recommendations = []
+    def _run_place(self, index: int, user_location: str, place: dict, match, emit,
+                   prompt_language: str = None) -> None:
+        try:
+            place_id = place.get("place_id") or self._get_place_id_by_name(place.get("name"), user_location)
+            if not place_id:
+                emit({"event": "skipped", "index": index})
+                return
 
-        for meal in meals:
-            place_id = meal.get("place_id") or self._get_place_id_by_name(meal["name"], user_location)
-            if place_id:
-                review_summary = self.review_agent.analyze_reviews(place_id)
-                combined = {
-                    **meal,
-                    **review_summary
-                }
+            with span("reviews"):
+                review_summary = self.review_agent.analyze_reviews(place_id, language=prompt_language)
+            emit({"event": "reviews_done", "index": index, "name": place.get("name")})
 
-                # Translate if needed
-                if self.translator:
-                    combined["match_summary"] = self.translator.translate(combined["match_summary"])
-                    combined["summary"] = self.translator.translate(combined["summary"])
+            with span("match"):
+                meal = match(index, place)
+            emit({"event": "match_done", "index": index, "name": meal.get("name")})
+            combined = {
+                **meal,
+                "place_id": place_id,
+                **review_summary
+            }
 
-                final_recommendations.append(combined)
+            # Static strings never went through a language-aware prompt
+            if prompt_language:
+                static = [field for field in ("match_summary", "summary") if combined[field] in STATIC_SUMMARIES]
+                if static:
+                    with span("translate"):
+                        translated = self.translator.translate_batch([combined[field] for field in static], prompt_language)
+                    combined.update(zip(static, translated))
 
-        return final_recommendations
+            emit({"event": "result", "index": index, "recommendation": combined})
+        except Exception as e:
+            print(f"⚠️ Failed to process {place.get('name')}: {e}")
+            emit({"event": "error", "index": index, "name": place.get("name"), "error": str(e)})
 
     def _get_place_id_by_name(self, name: str, location: str) -> str:
         """Fallback if place_id is missing. Attempts to retrieve a place ID by name search."""